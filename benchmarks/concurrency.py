@@ -0,0 +1,94 @@
+"""
+Stress benchmark for concurrent use of a ConnectionManager.
+
+N threads hammer recordset on a fresh ConnectionManager. The first calls all
+race to create the connection, which must result in a single engine and
+connection pool. After warm-up, the throughput with N threads is compared to
+a single thread to show the connection lookup adds no lock contention.
+
+Usage:
+    PYTHONPATH=. python benchmarks/concurrency.py [threads] [queries]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from simqle import ConnectionManager
+from simqle.connection_manager import _Connection
+
+SQL = "SELECT id, value FROM benchmark WHERE id = :id"
+
+
+def hammer(manager, threads, queries):
+    """Run <queries> recordsets on each of <threads> threads at once."""
+    barrier = threading.Barrier(threads + 1)
+
+    def query():
+        barrier.wait()
+        for i in range(queries):
+            manager.recordset(SQL, params={"id": i % 100})
+
+    workers = [threading.Thread(target=query) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start_time
+
+
+def main(threads=32, queries=500):
+    database = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    manager = ConnectionManager({
+        "connections": [
+            {"name": "benchmark",
+             "driver": "sqlite:///",
+             "connection": database,
+             "default": True,
+             "pool": {"class": "QueuePool", "size": threads},
+             "engine_options": {
+                 "connect_args": {"check_same_thread": False}}},
+        ]
+    })
+
+    manager.execute_sql("CREATE TABLE benchmark (id integer, value text)")
+    manager.execute_many("INSERT INTO benchmark VALUES (:id, :value)",
+                         params_list=({"id": i, "value": str(i)}
+                                      for i in range(100)))
+
+    # count the engines created while every thread races on a cold manager.
+    engines_created = []
+    connect = _Connection._connect
+
+    def counting_connect(connection):
+        engines_created.append(connection.name)
+        connect(connection)
+
+    _Connection._connect = counting_connect
+    try:
+        manager.reset_connections()
+        hammer(manager, threads, 1)
+    finally:
+        _Connection._connect = connect
+
+    print(f"engines created by {threads} cold threads: "
+          f"{len(engines_created)}")
+    assert len(engines_created) == 1, "duplicate engines were created"
+
+    # compare warm throughput on one thread and on every thread.
+    for thread_count in (1, threads):
+        elapsed_time = hammer(manager, thread_count, queries)
+        total = thread_count * queries
+
+        print(f"{thread_count:>3} threads: {total} queries in "
+              f"{elapsed_time:.3f}s ({total / elapsed_time:,.0f} queries/s)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""
+Microbenchmark of the logging overhead of each query.
+
+Compares the per-call cost of the query logging of previous versions, a
+uuid4 and two eagerly formatted f-strings of the SQL and params, with the
+QueryLogger, while the simqle logger is disabled and while it is enabled.
+The time of a whole recordset on an in-memory sqlite database is printed
+for scale.
+
+Usage:
+    PYTHONPATH=. python benchmarks/logging_overhead.py [calls]
+"""
+
+import logging
+import sys
+import time
+import timeit
+import uuid
+
+from simqle import ConnectionManager
+from simqle.logging import QueryLogger, logger as log
+
+SQL = "SELECT id, value FROM benchmark WHERE id = :id AND value = :value"
+PARAMS = {"id": 1, "value": "1"}
+CON_NAME = "benchmark"
+
+
+def previous_logging():
+    """The logging of a query by previous versions."""
+    recordset_id = uuid.uuid4()
+
+    log.info(f"Query started on {CON_NAME} with id={recordset_id}, "
+             f"params={PARAMS}, sql={SQL}")
+
+    start_time = time.time()
+    elapsed_time = time.time() - start_time
+
+    log.info(f"Query id {recordset_id} took {elapsed_time:.4f} seconds "
+             f"to complete")
+
+
+def query_logger_logging(query_logger=QueryLogger()):
+    """The logging of a query by a QueryLogger."""
+    start_time = time.perf_counter()
+    query_logger.log("Query", CON_NAME, SQL, PARAMS,
+                     time.perf_counter() - start_time)
+
+
+def per_call(function, calls):
+    """Return the best per-call time of <function> in microseconds."""
+    return min(timeit.repeat(function, number=calls, repeat=5)) / calls * 1e6
+
+
+def main(calls=100000):
+    manager = ConnectionManager({
+        "connections": [
+            {"name": CON_NAME,
+             "driver": "sqlite:///",
+             "connection": ":memory:",
+             "default": True,
+             "pool": {"class": "StaticPool"},
+             "engine_options": {
+                 "connect_args": {"check_same_thread": False}}},
+        ]
+    })
+    manager.execute_sql("CREATE TABLE benchmark (id integer, value text)")
+    manager.execute_sql("INSERT INTO benchmark VALUES (1, '1')")
+
+    # log records are handled, but not written anywhere.
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+
+    for level, state in ((logging.WARNING, "off"), (logging.INFO, "on")):
+        log.setLevel(level)
+
+        previous = per_call(previous_logging, calls)
+        current = per_call(query_logger_logging, calls)
+        recordset = per_call(lambda: manager.recordset(SQL, params=PARAMS),
+                             calls // 100)
+
+        print(f"logging {state}:")
+        print(f"  previous logging: {previous:8.3f} us per query")
+        print(f"  QueryLogger:      {current:8.3f} us per query")
+        print(f"  whole recordset:  {recordset:8.3f} us per query")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
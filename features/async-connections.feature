@@ -0,0 +1,15 @@
+Feature: async connections
+
+  As a SimQLe user
+  I want to be able to use my connections from asyncio code
+  So I don't have to run my queries in a thread pool
+
+  @fixture.sqlite
+  Scenario: An AsyncConnectionManager executes sql and returns data
+    When we load an async connection manager with a test dict
+    Then we can create a table, insert entries and return data asynchronously
+
+  @fixture.sqlite
+  Scenario: An async connection keeps its pool between queries
+    When we load an async connection manager with a test dict
+    Then the async connection keeps its pool between queries
@@ -41,6 +41,7 @@ Feature: database connections
     Then we can return a Recordset
     And we can return a Record
     And we can return a RecordScalar
+    And we can return a ColumnarRecordSet
 
   @fixture.sqlite
   Scenario: Data doesn't exists test
@@ -53,11 +54,128 @@ Feature: database connections
 
 # --- Testing other functionality ---
 
+  @fixture.sqlite
+  Scenario: execute many test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert 5 entries in batches of 2 on sqlite
+    Then there are 5 entries in the table on sqlite
+
+  @fixture.sqlite
+  Scenario: transaction test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert 3 entries in a transaction on sqlite
+    Then there are 3 entries in the table on sqlite
+
+  @fixture.sqlite
+  Scenario: transaction rollback test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry in a transaction that fails on sqlite
+    Then there are 0 entries in the table on sqlite
+
   @fixture.sqlite
   Scenario: get engine test
     When we load the test connections file
     Then we can get the connection object for sqlite
 
+  @fixture.sqlite
+  Scenario: bulk load test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we bulk load 5 entries in batches of 2 on sqlite
+    Then there are 5 entries in the table on sqlite
+
+  @fixture.sqlite
+  Scenario: bulk load dicts test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we bulk load 3 dict entries on sqlite
+    Then there are 3 entries in the table on sqlite
+
+  @fixture.sqlite
+  Scenario: statement cache test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then repeated queries on sqlite are only prepared once
+
+  @fixture.sqlite
+  Scenario: query metrics test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then the query metrics of sqlite are recorded
+
+  @fixture.sqlite
+  Scenario: query logging test
+    When we load the test connections file
+    And we create a table on sqlite
+    Then the queries on sqlite are logged with sampling and redaction
+
+  @fixture.sqlite
+  Scenario: slow query log test
+    When we load a connection manager with a slow query threshold
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then the slow queries on sqlite are recorded with their plans
+
+  @fixture.sqlite
+  Scenario: concurrent queries test
+    When we load the test connections file
+    Then independent queries on sqlite run concurrently in order
+
+  @fixture.sqlite
+  Scenario: sharded queries test
+    When we load a connection manager with a shard group
+    Then a query on the shard group returns the merged rows
+    And a shard group without shards is rejected
+
+  @fixture.sqlite
+  Scenario: connection manager subclass test
+    Then a connection manager must define how its connections are created
+
+  @fixture.sqlite
+  Scenario: read replicas test
+    When we load a connection manager with read replicas
+    Then reads are routed to the replicas and writes to the primary
+    And a bad query doesn't eject a replica
+    And a failing replica is ejected and the primary is read instead
+
+  @fixture.sqlite
+  Scenario: named queries test
+    When we load a connection file with named queries
+    And we create a table on sqlite
+    Then we can run the named queries
+    And named queries with invalid config raise an error
+
+  @fixture.sqlite
+  Scenario: warm up test
+    When we load a connection manager with pool options
+    Then warming up the connections fills their pools
+
+  @fixture.sqlite
+  Scenario: fork safety test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then a forked process replaces the inherited connection pool
+
+  @fixture.sqlite
+  Scenario: process pool test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then a process pool runs queries with only the config
+
+  @fixture.sqlite
+  Scenario: concurrent connections test
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then 16 threads querying sqlite at once share a single engine
+
   @fixture.sqlite
   Scenario: reset connections test
     When we load the test connections file
@@ -77,14 +195,38 @@ Feature: database connections
     And we insert an entry on sqlite
     Then we can return a Recordset
 
+  @fixture.sqlite
+  Scenario: A connection can configure its pool and engine options
+    When we load a connection manager with pool options
+    Then the engine is created with the pool options
+
 # --- Error Handling ---
 
+  @fixture.sqlite
+  Scenario: An error occurs when an unknown pool option is given
+    When we load a connection manager with pool options
+    And we get the engine of a connection with an unknown pool option
+    Then it throws a UnknownPoolOptionError with message "size_limit is an unknown pool option"
+
+  @fixture.sqlite
+  Scenario: An error occurs when an unknown pool class is given
+    When we load a connection manager with pool options
+    And we get the engine of a connection with an unknown pool class
+    Then it throws a UnknownPoolOptionError with message "LakePool is an unknown pool class"
+
   @fixture.sqlite
   Scenario: An error occurs when an unknown connection name is given
     When we load the test connections file
     And we create a table on wrongname
     Then it throws a UnknownConnectionError with message "Unknown connection my-wrongname-database"
 
+  @fixture.sqlite
+  Scenario: An error occurs when an unknown bulk load method is given
+    When we load the test connections file
+    And we create a table on sqlite
+    And we bulk load with the method teleport on sqlite
+    Then it throws a BulkLoadError with message "teleport is an unknown bulk load method"
+
   @fixture.sqlite
   Scenario: A SQL error raises an exception
     When we load the test connections file
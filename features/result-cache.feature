@@ -0,0 +1,46 @@
+Feature: result cache
+
+  As a SimQLe user
+  I want to be able to cache the results of read-only queries
+  So reference data isn't queried from the database on every request
+
+  @fixture.sqlite
+  Scenario: Cached results are returned until they are invalidated
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    And we query sqlite with a cache_ttl of 60 and the tag reference
+    And we insert an entry on sqlite
+    Then the cached result on sqlite has 2 entries
+    And the uncached result on sqlite has 4 entries
+    When we invalidate the tag reference
+    Then the cached result on sqlite has 4 entries
+
+  @fixture.sqlite
+  Scenario: Cached results expire after their cache_ttl
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    And we query sqlite with a cache_ttl of 0.05 and the tag reference
+    And we insert an entry on sqlite
+    And we wait 0.1 seconds
+    Then the cached result on sqlite has 4 entries
+
+  @fixture.sqlite
+  Scenario: Cached results are invalidated by connection
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    And we query sqlite with a cache_ttl of 60 and the tag reference
+    And we insert an entry on sqlite
+    And we invalidate the connection sqlite
+    Then the cached result on sqlite has 4 entries
+
+  @fixture.sqlite
+  Scenario: Changing a cached result doesn't change later results
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    And we query sqlite with a cache_ttl of 60 and the tag reference
+    And we change the cached result on sqlite
+    Then the cached result on sqlite has 2 entries
@@ -0,0 +1,85 @@
+"""Steps testing the AsyncConnectionManager."""
+
+import asyncio
+import os
+
+from behave import when, then
+
+from features.steps.constants import (
+    CREATE_TABLE_SYNTAX, TEST_TABLE_NAME, ASYNC_TEST_DICT,
+)
+from simqle import AsyncConnectionManager
+from simqle.recordset import RecordSet, RecordScalar, Record
+
+
+@when("we load an async connection manager with a test dict")
+def load_async_connection_manager(context):
+    """Set up an AsyncConnectionManager with an async sqlite connection."""
+    context.manager = AsyncConnectionManager(ASYNC_TEST_DICT)
+
+
+@then("we can create a table, insert entries and return data asynchronously")
+def async_round_trip(context):
+    """Test each of the AsyncConnectionManager methods."""
+
+    async def round_trip(manager):
+        await manager.execute_sql(CREATE_TABLE_SYNTAX["sqlite"])
+        await manager.execute_sql(
+            "INSERT INTO {} (testfield) VALUES (:str_value), (:int_value)"
+            .format(TEST_TABLE_NAME),
+            params={"str_value": "foo", "int_value": "1"})
+
+        sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+        results = (
+            await manager.recordset(sql),
+            await manager.record(sql, con_name="my-sqlite-database"),
+            await manager.record_scalar(sql),
+        )
+
+        await manager.dispose()
+        return results
+
+    rst, record, scalar = asyncio.run(round_trip(context.manager))
+
+    assert isinstance(rst, RecordSet)
+    assert rst.headings == ["id", "testfield"]
+    assert rst.data == [(1, "foo"), (2, "1")]
+
+    assert isinstance(record, Record)
+    assert record.data == (1, "foo")
+
+    assert isinstance(scalar, RecordScalar)
+    assert scalar.datum == 1
+
+    assert context.manager.connections == {}
+
+
+@then("the async connection keeps its pool between queries")
+def async_pool_kept(context):
+    """Test the async engine's pool is only replaced in a new process."""
+
+    async def two_queries(manager):
+        await manager.execute_sql(CREATE_TABLE_SYNTAX["sqlite"])
+        connection = manager.connections["my-sqlite-database"]
+        created_here = connection._pid == os.getpid()
+        engine, pool = connection.engine, connection.engine.sync_engine.pool
+
+        await manager.recordset("SELECT 1")
+        unchanged = (created_here and connection.engine is engine
+                     and connection.engine.sync_engine.pool is pool)
+
+        # a process that inherited the engine replaces its pool.
+        connection._pid = -1
+        replaced = (connection.engine is engine
+                    and connection.engine.sync_engine.pool is not pool
+                    and connection._pid == os.getpid())
+        rst = await manager.recordset("SELECT 1 AS one")
+
+        await manager.dispose()
+        return unchanged, replaced, rst
+
+    unchanged, replaced, rst = asyncio.run(two_queries(context.manager))
+
+    assert unchanged
+    assert replaced
+    assert rst.data == [(1,)]
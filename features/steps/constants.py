@@ -3,6 +3,7 @@
 CONN_DIR = "./features/test-connection-files/"
 CONNECTIONS_FILE = CONN_DIR + ".connections.yaml"
 CONNECTIONS_FILE_WITH_DEFAULT = CONN_DIR + ".connections-with-default.yaml"
+CONNECTIONS_FILE_WITH_QUERIES = CONN_DIR + ".connections-with-queries.yaml"
 CONNECTIONS_FILE_WITH_DEFAULTS = CONN_DIR + ".connections-with-2-defaults.yaml"
 CONNECTIONS_FILE_WITH_WRONG_DEFAULTS = CONN_DIR + \
                                        ".connections-with-wrong-defaults.yaml"
@@ -66,3 +67,82 @@ TEST_DICT = {
          "connection": "/tmp/database2.db"},
     ]
 }
+
+POOL_DICT = {
+    "connections": [
+        {"name": "my-sqlite-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/database.db",
+         "pool": {"class": "QueuePool", "size": 2, "max_overflow": 1,
+                  "timeout": 5, "recycle": 3600, "pre_ping": True},
+         "engine_options": {"connect_args": {"timeout": 10,
+                                             "check_same_thread": False}}},
+
+        {"name": "my-unknown-option-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/database.db",
+         "pool": {"size_limit": 2}},
+
+        {"name": "my-unknown-class-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/database.db",
+         "pool": {"class": "LakePool"}},
+    ]
+}
+
+SLOW_QUERY_DICT = {
+    "connections": [
+        {"name": "my-sqlite-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/database.db",
+         "slow_query_threshold": 0,
+         "explain": True},
+
+        {"name": "my-sqlite-database2",
+         "driver": "sqlite:///",
+         "connection": "/tmp/database2.db"},
+    ]
+}
+
+SHARD_DICT = {
+    "connections": [
+        {"name": "my-sqlite-shard-1",
+         "driver": "sqlite:///",
+         "connection": "/tmp/shard-1.db"},
+
+        {"name": "my-sqlite-shard-2",
+         "driver": "sqlite:///",
+         "connection": "/tmp/shard-2.db"},
+
+        {"name": "my-sqlite-shards",
+         "shards": ["my-sqlite-shard-1", "my-sqlite-shard-2"]},
+    ]
+}
+
+REPLICA_DICT = {
+    "connections": [
+        {"name": "my-replicated-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/primary.db",
+         "replicas": [{"connection": "/tmp/replica-1.db"},
+                      {"connection": "/tmp/replica-2.db"}],
+         "replica_strategy": "round_robin"},
+
+        {"name": "my-broken-replica-database",
+         "driver": "sqlite:///",
+         "connection": "/tmp/primary.db",
+         "replicas": [{"name": "my-broken-replica",
+                       "connection": "/tmp/missing-directory/replica.db"}],
+         "replica_strategy": "least_outstanding"},
+    ]
+}
+
+ASYNC_TEST_DICT = {
+    "connections": [
+        {"name": "my-sqlite-database",
+         "driver": "sqlite:///",
+         "async_driver": "sqlite+aiosqlite:///",
+         "connection": "/tmp/database.db",
+         "default": True},
+    ]
+}
@@ -6,19 +6,35 @@ from simqle import (
     execute_sql, recordset, reset_connections
 )
 from simqle import internal
+from simqle.connection_manager import _BaseConnectionManager
+from simqle.logging import QueryLogger
+from simqle.instrumentation import (
+    MetricsAggregator, fingerprint, prometheus_text,
+)
 from simqle.exceptions import *
 from constants import (
     CONNECTIONS_FILE,
     CREATE_TABLE_SYNTAX,
     TEST_TABLE_NAME,
     CONNECTIONS_FILE_WITH_DEFAULT,
+    CONNECTIONS_FILE_WITH_QUERIES,
     CONNECTIONS_FILE_WITH_DEFAULTS,
     CONNECTIONS_FILE_WITH_WRONG_DEFAULTS,
-    TEST_DICT
+    TEST_DICT,
+    POOL_DICT,
+    SLOW_QUERY_DICT,
+    SHARD_DICT,
+    REPLICA_DICT,
 )
+import logging
+import multiprocessing
 import os
+import threading
+import time
 import yaml
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
 from urllib.parse import quote_plus
 
 
@@ -106,6 +122,79 @@ def load_default_connection_file(context):
         context.exc = e
 
 
+@when("we load a connection manager with pool options")
+def load_pool_options_dict(context):
+    """Set up the context manager with connections that configure pools."""
+    try:
+        context.manager = ConnectionManager(POOL_DICT)
+        context.exc = None
+    except Exception as e:
+        context.exc = e
+
+
+@when("we load a connection file with named queries")
+def load_queries_connection_file(context):
+    """Set up the context manager with a file that has named queries."""
+    context.manager = ConnectionManager(
+        file_name=CONNECTIONS_FILE_WITH_QUERIES)
+
+
+@when("we load a connection manager with a slow query threshold")
+def load_slow_query_dict(context):
+    """Set up the context manager with a connection that logs slow queries."""
+    context.manager = ConnectionManager(SLOW_QUERY_DICT)
+
+
+@when("we load a connection manager with a shard group")
+def load_shard_dict(context):
+    """Set up the context manager with two sqlite shards in a group."""
+    context.manager = ConnectionManager(SHARD_DICT)
+
+    # the even numbers are on the first shard, the odd on the second
+    for shard in (1, 2):
+        con_name = "my-sqlite-shard-{}".format(shard)
+        context.manager.execute_sql(
+            con_name=con_name,
+            sql="DROP TABLE IF EXISTS {}".format(TEST_TABLE_NAME))
+        context.manager.execute_sql(
+            con_name=con_name,
+            sql=CREATE_TABLE_SYNTAX["sqlite"])
+        context.manager.execute_many(
+            con_name=con_name,
+            sql="INSERT INTO {} (id, testfield) VALUES (:id, :value)".format(
+                TEST_TABLE_NAME),
+            params_list=[{"id": i, "value": str(i)}
+                         for i in range(shard - 1, 10, 2)])
+
+
+@when("we load a connection manager with read replicas")
+def load_replica_dict(context):
+    """Set up the context manager with a primary and its replicas."""
+    context.manager = ConnectionManager(REPLICA_DICT)
+
+    # each database records its own name
+    for con_name in ("my-replicated-database",
+                     "my-replicated-database-replica-1",
+                     "my-replicated-database-replica-2"):
+        with context.manager.transaction(con_name) as tx:
+            tx.execute_sql("DROP TABLE IF EXISTS replica_test")
+            tx.execute_sql("CREATE TABLE replica_test (source text)")
+            tx.execute_sql("INSERT INTO replica_test VALUES (:source)",
+                           params={"source": con_name})
+
+
+@when("we get the engine of a connection with an unknown pool {option}")
+def get_unknown_pool_option_engine(context, option):
+    """Get the engine of a connection with an invalid pool block."""
+    con_name = "my-unknown-{}-database".format(option)
+
+    try:
+        context.manager.get_engine(con_name)
+        context.exc = None
+    except Exception as e:
+        context.exc = e
+
+
 @when("we create a table on {con_type}")
 def create_a_table(context, con_type):
     """Create a table on a specific connections."""
@@ -166,6 +255,110 @@ def update_an_entry(context, con_type):
                                 params=params)
 
 
+@when("we insert {count:d} entries in batches of {batch_size:d} on {con_type}")
+def insert_many_entries(context, count, batch_size, con_type):
+    """Insert several entries with a single execute_many call."""
+    con_name = "my-{}-database".format(con_type)
+
+    insert_record_sql = """
+        INSERT INTO {} (testfield)
+        VALUES (:value)
+        """.format(TEST_TABLE_NAME)
+
+    # a generator, so the params are never all in memory
+    params_list = ({"value": str(i)} for i in range(count))
+
+    row_count = context.manager.execute_many(con_name=con_name,
+                                             sql=insert_record_sql,
+                                             params_list=params_list,
+                                             batch_size=batch_size)
+
+    assert row_count == count
+
+
+@when("we insert {count:d} entries in a transaction on {con_type}")
+def insert_entries_in_transaction(context, count, con_type):
+    """Insert several entries and read them back in a single transaction."""
+    con_name = "my-{}-database".format(con_type)
+
+    insert_record_sql = """
+        INSERT INTO {} (testfield)
+        VALUES (:value)
+        """.format(TEST_TABLE_NAME)
+    count_sql = "SELECT COUNT(*) AS total FROM {}".format(TEST_TABLE_NAME)
+
+    with context.manager.transaction(con_name) as tx:
+        for i in range(count - 1):
+            tx.execute_sql(insert_record_sql, params={"value": str(i)})
+
+        tx.execute_many(insert_record_sql,
+                        params_list=[{"value": str(count - 1)}])
+
+        # the uncommitted entries are visible inside the transaction
+        assert tx.record_scalar(count_sql).datum == count
+        assert tx.recordset(count_sql).column("total") == [count]
+        assert tx.record(count_sql)["total"] == count
+
+
+@when("we insert an entry in a transaction that fails on {con_type}")
+def insert_entry_in_failed_transaction(context, con_type):
+    """Insert an entry in a transaction, then raise an error inside it."""
+    con_name = "my-{}-database".format(con_type)
+
+    insert_record_sql = """
+        INSERT INTO {} (testfield)
+        VALUES (:value)
+        """.format(TEST_TABLE_NAME)
+
+    try:
+        with context.manager.transaction(con_name) as tx:
+            tx.execute_sql(insert_record_sql, params={"value": "0"})
+            raise ValueError("Failed transaction")
+
+    except ValueError:
+        pass
+
+    else:
+        raise AssertionError("The transaction didn't raise its exception")
+
+
+@when("we bulk load {count:d} entries in batches of {batch_size:d} on "
+      "{con_type}")
+def bulk_load_entries(context, count, batch_size, con_type):
+    """Bulk load a generator of tuples into the test table."""
+    con_name = "my-{}-database".format(con_type)
+    rows = ((str(i),) for i in range(count))
+
+    row_count = context.manager.bulk_load(TEST_TABLE_NAME, rows,
+                                          con_name=con_name,
+                                          columns=["testfield"],
+                                          batch_size=batch_size)
+    assert row_count == count
+
+
+@when("we bulk load {count:d} dict entries on {con_type}")
+def bulk_load_dict_entries(context, count, con_type):
+    """Bulk load a list of dicts into the test table."""
+    con_name = "my-{}-database".format(con_type)
+    rows = [{"testfield": str(i)} for i in range(count)]
+
+    context.manager.bulk_load(TEST_TABLE_NAME, rows, con_name=con_name)
+
+
+@when("we bulk load with the method {method} on {con_type}")
+def bulk_load_with_method(context, method, con_type):
+    """Bulk load an entry with a given method."""
+    con_name = "my-{}-database".format(con_type)
+
+    try:
+        context.manager.bulk_load(TEST_TABLE_NAME, [("foo",)],
+                                  con_name=con_name, columns=["testfield"],
+                                  method=method)
+        context.exc = None
+    except Exception as e:
+        context.exc = e
+
+
 @when("we insert an entry with no connection name")
 def update_an_entry_with_no_connection(context):
     """Update an entry with no connection type."""
@@ -260,6 +453,465 @@ def entry_exists(context, con_type):
     assert rst.headings == ["id", "testfield"]
 
 
+@then("the query metrics of sqlite are recorded")
+def query_metrics_recorded(context):
+    """Test that a MetricsAggregator records each query on sqlite."""
+    con_name = "my-sqlite-database"
+    sql = "SELECT testfield FROM {} WHERE id = :id".format(TEST_TABLE_NAME)
+
+    aggregator = MetricsAggregator()
+    context.manager.instrumentation.add_hook(aggregator)
+
+    for i in range(3):
+        context.manager.recordset(con_name=con_name, sql=sql,
+                                  params={"id": i + 1})
+
+    try:
+        context.manager.recordset(con_name=con_name,
+                                  sql="SELECT * FROM missing_table")
+    except Exception:
+        pass
+
+    context.manager.instrumentation.remove_hook(aggregator)
+    context.manager.recordset(con_name=con_name, sql=sql, params={"id": 1})
+
+    connection_stats = aggregator.connections[con_name]
+    assert connection_stats.queries == 4
+    assert connection_stats.errors == 1
+    assert connection_stats.rows == 2
+    assert connection_stats.histograms["total"].count == 4
+
+    # the three queries with different params share one fingerprint
+    query_stats = aggregator.fingerprints[(con_name, fingerprint(sql))]
+    assert query_stats.queries == 3
+    assert fingerprint(sql).endswith("WHERE id = ?")
+
+    text = prometheus_text(aggregator)
+    assert ('simqle_query_queries_total{{connection="{}"}} 4'.format(con_name)
+            in text)
+    assert ('simqle_query_duration_seconds_count{{connection="{}",'
+            'phase="fetch"}} 4'.format(con_name) in text)
+
+    # the time spent reading a stream between fetches isn't counted
+    events = []
+    hook = events.append
+    context.manager.instrumentation.add_hook(hook)
+    with context.manager.stream_recordset(
+            con_name=con_name, batch_size=1,
+            sql="SELECT id FROM {}".format(TEST_TABLE_NAME)) as stream:
+        for _ in stream:
+            time.sleep(0.1)
+    context.manager.instrumentation.remove_hook(hook)
+
+    event, = events
+    assert event.row_count == 2
+    assert event.total_time < 0.1
+    assert event.total_time == (event.checkout_time + event.execute_time
+                                + event.fetch_time)
+
+
+@then("the queries on sqlite are logged with sampling and redaction")
+def queries_logged(context):
+    """Test that a QueryLogger samples, truncates and redacts queries."""
+    con_name = "my-sqlite-database"
+    sql = "SELECT testfield FROM {} WHERE testfield = :value".format(
+        TEST_TABLE_NAME)
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("simqle")
+    logger.addHandler(handler)
+    level = logger.level
+    logger.setLevel(logging.INFO)
+
+    try:
+        # 1 in 2 queries are logged
+        context.manager.query_logger = QueryLogger(max_sql_length=20,
+                                                   sample_every=2)
+        for _ in range(4):
+            context.manager.recordset(con_name=con_name, sql=sql,
+                                      params={"value": "secret"})
+
+        assert len(records) == 2
+        message = records[0].getMessage()
+        assert "SELECT testfield FRO..." in message
+        assert "{value: str}" in message
+        assert "secret" not in message
+
+        # slow queries are always logged, as warnings
+        del records[:]
+        context.manager.query_logger = QueryLogger(sample_every=1000,
+                                                   slow_query_threshold=0)
+        for _ in range(2):
+            context.manager.recordset(con_name=con_name, sql=sql,
+                                      params={"value": "secret"})
+
+        assert [record.levelno for record in records] == [logging.WARNING] * 2
+
+        # nothing is logged when the logger is disabled
+        del records[:]
+        context.manager.query_logger = QueryLogger()
+        logger.setLevel(logging.WARNING)
+        context.manager.recordset(con_name=con_name, sql=sql,
+                                  params={"value": "secret"})
+
+        assert not records
+
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+
+@then("the slow queries on sqlite are recorded with their plans")
+def slow_queries_recorded(context):
+    """Test that queries over the threshold are kept with their plan."""
+    sql = "SELECT testfield FROM {} WHERE id = :id".format(TEST_TABLE_NAME)
+
+    # forget the statements that created the table
+    context.manager.slow_query_log.clear()
+
+    context.manager.recordset(con_name="my-sqlite-database", sql=sql,
+                              params={"id": 1})
+    context.manager.execute_sql(con_name="my-sqlite-database",
+                                sql="DELETE FROM {} WHERE id = 0".format(
+                                    TEST_TABLE_NAME))
+    # this connection has no threshold
+    context.manager.recordset(con_name="my-sqlite-database2",
+                              sql="SELECT 1")
+
+    slow_queries = context.manager.slow_queries(
+        fingerprint=fingerprint(sql))
+    assert len(slow_queries) == 1
+
+    slow_query = slow_queries[0]
+    assert slow_query.con_name == "my-sqlite-database"
+    assert slow_query.params_shape == {"id": "int"}
+    assert slow_query.duration >= 0
+    assert "detail" in slow_query.explain.headings
+
+    # the statement is recorded, but only queries returning rows are
+    # explained.
+    assert len(context.manager.slow_queries("my-sqlite-database")) == 2
+    assert context.manager.slow_queries()[-1].explain is None
+    assert not context.manager.slow_queries("my-sqlite-database2")
+
+
+@then("independent queries on sqlite run concurrently in order")
+def queries_run_concurrently(context):
+    """Test recordset_many returns results in order and collects errors."""
+    sql = "SELECT :value AS value"
+    queries = [(sql, "my-sqlite-database", {"value": i}) for i in range(10)]
+
+    results = context.manager.recordset_many(queries, max_workers=4)
+    assert [rst.data[0][0] for rst in results] == list(range(10))
+
+    # errors are collected, and raised together
+    queries.insert(3, ("SELECT * FROM missing_table", "my-sqlite-database"))
+    try:
+        context.manager.recordset_many(queries)
+    except ConcurrentQueryError as e:
+        assert list(e.errors) == [3]
+        assert e.results[4].data[0][0] == 3
+    else:
+        raise AssertionError("ConcurrentQueryError wasn't raised")
+
+    results = context.manager.recordset_many(queries,
+                                             return_exceptions=True)
+    assert isinstance(results[3], Exception)
+
+    # a slow query times out without holding up the others
+    slow_sql = """
+        WITH RECURSIVE numbers(x) AS (
+            SELECT 1 UNION ALL SELECT x + 1 FROM numbers WHERE x < 10000000
+        )
+        SELECT COUNT(*) FROM numbers
+        """
+    results = context.manager.recordset_many(
+        [(slow_sql, "my-sqlite-database"),
+         (sql, "my-sqlite-database", {"value": 1})],
+        timeout=0.05, return_exceptions=True)
+
+    assert isinstance(results[0], QueryTimeoutError)
+    assert results[1].data[0][0] == 1
+
+
+@then("a query on the shard group returns the merged rows")
+def sharded_rows_merged(context):
+    """Test that recordset_sharded merges the rows of every shard."""
+    sql = "SELECT id, testfield FROM {} ORDER BY id".format(TEST_TABLE_NAME)
+
+    rst = context.manager.recordset_sharded(sql, "my-sqlite-shards")
+    assert rst.column("id") == [0, 2, 4, 6, 8, 1, 3, 5, 7, 9]
+
+    rst = context.manager.recordset_sharded(sql, "my-sqlite-shards",
+                                            order_by="id")
+    assert rst.column("id") == list(range(10))
+
+    # the limit is pushed down to each shard
+    sql = """
+        SELECT id, testfield FROM {} WHERE id > :minimum
+        ORDER BY id DESC LIMIT :limit
+        """.format(TEST_TABLE_NAME)
+    rst = context.manager.recordset_sharded(sql, "my-sqlite-shards",
+                                            params={"minimum": 2},
+                                            order_by=["id"], descending=True,
+                                            limit=3)
+    assert rst.column("id") == [9, 8, 7]
+
+    # NULLs are merged first, unless the shards order them last
+    sql = """
+        SELECT CASE WHEN id > 1 THEN id END AS value FROM {}
+        ORDER BY value {}
+        """
+    rst = context.manager.recordset_sharded(
+        sql.format(TEST_TABLE_NAME, ""), "my-sqlite-shards", order_by="value")
+    assert rst.column("value") == [None, None] + list(range(2, 10))
+
+    rst = context.manager.recordset_sharded(
+        sql.format(TEST_TABLE_NAME, "DESC"), "my-sqlite-shards",
+        order_by="value", descending=True)
+    assert rst.column("value") == list(range(9, 1, -1)) + [None, None]
+
+    rst = context.manager.recordset_sharded(
+        sql.format(TEST_TABLE_NAME, "IS NULL, value"), "my-sqlite-shards",
+        order_by="value", nulls_last=True)
+    assert rst.column("value") == list(range(2, 10)) + [None, None]
+
+    try:
+        context.manager.recordset_sharded(sql, "my-unknown-shards")
+    except UnknownConnectionError:
+        pass
+    else:
+        raise AssertionError("UnknownConnectionError wasn't raised")
+
+
+@then("a connection manager must define how its connections are created")
+def abstract_connection_manager(context):
+    """Test that a subclass without _new_connection can't be created."""
+
+    class IncompleteConnectionManager(_BaseConnectionManager):
+        pass
+
+    try:
+        IncompleteConnectionManager(TEST_DICT)
+    except TypeError as e:
+        assert "_new_connection" in str(e)
+    else:
+        raise AssertionError("TypeError wasn't raised")
+
+
+@then("a shard group without shards is rejected")
+def empty_shard_group_rejected(context):
+    """Test that a shard group must have shards."""
+    config = {"connections": SHARD_DICT["connections"][:2] + [
+        {"name": "my-empty-shards", "shards": []}]}
+
+    try:
+        ConnectionManager(config)
+    except EmptyShardGroupError as e:
+        assert e.message == "The shard group my-empty-shards has no shards"
+    else:
+        raise AssertionError("EmptyShardGroupError wasn't raised")
+
+
+@then("reads are routed to the replicas and writes to the primary")
+def reads_routed_to_replicas(context):
+    """Test that reads go to the replicas in turn, and writes don't."""
+    con_name = "my-replicated-database"
+    sql = "SELECT source FROM replica_test"
+
+    sources = [context.manager.record_scalar(sql, con_name).datum
+               for _ in range(4)]
+    assert sources == ["my-replicated-database-replica-1",
+                       "my-replicated-database-replica-2"] * 2
+
+    # writes and transactions use the primary
+    context.manager.execute_sql("DELETE FROM replica_test", con_name)
+    with context.manager.transaction(con_name) as tx:
+        assert not tx.recordset(sql)
+
+    assert context.manager.recordset(sql, con_name)
+
+    latencies = context.manager.check_replicas(con_name)[con_name]
+    assert all(latency is not None for latency in latencies.values())
+
+
+@then("a bad query doesn't eject a replica")
+def bad_query_not_ejected(context):
+    """Test that an error in the SQL is raised without ejecting replicas."""
+    con_name = "my-replicated-database"
+
+    for _ in range(2):
+        try:
+            context.manager.recordset("SELECT missing FROM replica_test",
+                                      con_name)
+        except OperationalError:
+            pass
+        else:
+            raise AssertionError("OperationalError wasn't raised")
+
+    for replica in context.manager._replica_set(con_name).replicas:
+        assert replica.ejected_until == 0
+        assert replica.outstanding == 0
+
+
+@then("a failing replica is ejected and the primary is read instead")
+def failing_replica_ejected(context):
+    """Test that a replica that can't be reached isn't read from."""
+    con_name = "my-broken-replica-database"
+    # the primary's table was emptied by the previous step
+    sql = "SELECT COUNT(*) FROM replica_test"
+
+    assert context.manager.record_scalar(sql, con_name).datum == 0
+
+    replica = context.manager._replica_set(con_name).replicas[0]
+    assert replica.outstanding == 0
+    assert replica.ejected_until > 0
+
+    latencies = context.manager.check_replicas()
+    assert set(latencies) == {con_name, "my-replicated-database"}
+    assert latencies[con_name] == {"my-broken-replica": None}
+
+
+@then("warming up the connections fills their pools")
+def warm_up_connections(context):
+    """Test that warming up opens pooled connections and reports errors."""
+    timings = context.manager.warm_up(min_connections=3)
+
+    assert set(timings) == {"my-sqlite-database",
+                            "my-unknown-option-database",
+                            "my-unknown-class-database"}
+
+    # the QueuePool keeps at most its size of 2 connections
+    timing = timings["my-sqlite-database"]
+    assert timing["connections"] == 2
+    assert timing["engine_time"] >= 0 and timing["connect_time"] >= 0
+    assert timing["error"] is None
+    assert context.manager.get_engine(
+        "my-sqlite-database").pool.checkedin() == 2
+
+    timing = timings["my-unknown-option-database"]
+    assert timing["connections"] == 0
+    assert isinstance(timing["error"], UnknownPoolOptionError)
+
+    timings = context.manager.warm_up(["my-sqlite-database"], parallel=False)
+    assert list(timings) == ["my-sqlite-database"]
+    assert timings["my-sqlite-database"]["connections"] == 1
+
+
+@then("a forked process replaces the inherited connection pool")
+def forked_process_replaces_pool(context):
+    """Test that a child process doesn't use its parent's connections."""
+    con_name = "my-sqlite-database"
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+
+    parent_pool = context.manager.get_engine(con_name).pool
+    fork_context = multiprocessing.get_context("fork")
+    queue = fork_context.Queue()
+
+    def child():
+        child_pool = context.manager.get_engine(con_name).pool
+        queue.put((child_pool is not parent_pool,
+                   len(context.manager.recordset(sql, con_name).data)))
+
+    process = fork_context.Process(target=child)
+    process.start()
+    result = queue.get(timeout=30)
+    process.join()
+
+    assert result == (True, 2)
+    assert context.manager.get_engine(con_name).pool is parent_pool
+    assert len(context.manager.recordset(sql, con_name).data) == 2
+
+
+@then("a process pool runs queries with only the config")
+def process_pool_runs_queries(context):
+    """Test that queries run in worker processes built from the config."""
+    con_name = "my-sqlite-database"
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    expected = [tuple(row) for row in
+                context.manager.recordset(sql, con_name).data]
+
+    with context.manager.process_pool(max_workers=2) as process_pool:
+        assert process_pool.config == CONNECTIONS_FILE
+
+        rst = process_pool.recordset(sql, con_name)
+        assert rst.headings == ["id", "testfield"]
+        assert [tuple(row) for row in rst.data] == expected
+
+        results = process_pool.recordset_many(
+            [(sql, con_name), (sql, "my-wrongname-database")],
+            return_exceptions=True)
+        assert [tuple(row) for row in results[0].data] == expected
+        assert isinstance(results[1], UnknownConnectionError)
+
+        try:
+            process_pool.recordset_many([(sql, "my-wrongname-database")])
+        except ConcurrentQueryError as e:
+            assert list(e.errors) == [0]
+        else:
+            raise AssertionError("ConcurrentQueryError wasn't raised")
+
+
+@then("we can run the named queries")
+def run_named_queries(context):
+    """Test that named queries run with their connection and return type."""
+    assert len(context.manager.queries) == 3
+
+    assert context.manager.run("insert_entry", {"value": "foo"}) is None
+
+    record = context.manager.run("get_entry", {"id": 1})
+    assert record["testfield"] == "foo"
+
+    assert context.manager.run("count_entries").datum == 1
+
+    for params in ({}, {"id": 1, "value": "foo"}):
+        try:
+            context.manager.run("get_entry", params)
+        except QueryParamsError:
+            pass
+        else:
+            raise AssertionError("QueryParamsError wasn't raised")
+
+    try:
+        context.manager.run("missing_query")
+    except UnknownQueryError:
+        pass
+    else:
+        raise AssertionError("UnknownQueryError wasn't raised")
+
+
+@then("named queries with invalid config raise an error")
+def invalid_named_queries(context):
+    """Test that invalid named queries are found when they're loaded."""
+    invalid_queries = [
+        [{"name": "query", "sql": "SELECT 1", "returns": "dataframe"}],
+        [{"name": "query", "sql": "SELECT 1", "connection": "missing"}],
+        [{"name": "query"}],
+        [{"name": "query", "sql": "SELECT 1"},
+         {"name": "query", "sql": "SELECT 2"}],
+    ]
+
+    for queries in invalid_queries:
+        try:
+            ConnectionManager(dict(TEST_DICT, queries=queries))
+        except QueryConfigError:
+            pass
+        else:
+            raise AssertionError("QueryConfigError wasn't raised")
+
+
+@then("there are {count:d} entries in the table on {con_type}")
+def entries_exist(context, count, con_type):
+    """Test that the expected entries exist."""
+    sql = "SELECT testfield FROM {} ORDER BY id".format(TEST_TABLE_NAME)
+    con_name = "my-{}-database".format(con_type)
+    rst = context.manager.recordset(con_name=con_name, sql=sql)
+
+    assert rst.column("testfield") == [str(i) for i in range(count)]
+
+
 @then("the entry exists in the internal table on {con_type}")
 def internal_entry_exists(context, con_type):
     """Test if internal entry exists and is correct."""
@@ -303,6 +955,73 @@ def get_connection_object(context, connection):
     assert isinstance(engine, Engine)
 
 
+@then("repeated queries on {con_type} are only prepared once")
+def statement_cache_test(context, con_type):
+    """Test that the statement cache counts its hits and misses."""
+    sql = "SELECT id, testfield FROM {} WHERE id = :id".format(
+        TEST_TABLE_NAME)
+    con_name = "my-{}-database".format(con_type)
+    cache = context.manager.statement_cache
+    cache.clear()
+
+    for id_ in (1, 2, 1):
+        rst = context.manager.recordset(con_name=con_name, sql=sql,
+                                        params={"id": id_})
+        assert rst.column("id") == [id_]
+
+    assert cache.misses == 1
+    assert cache.hits == 2
+
+
+@then("the engine is created with the pool options")
+def check_pool_options(context):
+    """Check the pool and engine options were passed to create_engine."""
+    engine = context.manager.get_engine("my-sqlite-database")
+
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 2
+    assert engine.pool._max_overflow == 1
+    assert engine.pool._timeout == 5
+    assert engine.pool._recycle == 3600
+    assert engine.pool._pre_ping
+
+    # connect_args are passed through to the driver
+    assert context.manager.record_scalar(
+        con_name="my-sqlite-database", sql="SELECT 1").datum == 1
+
+
+@then("{count:d} threads querying {con_type} at once share a single engine")
+def concurrent_connections_test(context, count, con_type):
+    """Test that concurrent first calls only create one engine."""
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    con_name = "my-{}-database".format(con_type)
+    context.manager.reset_connections()
+
+    barrier = threading.Barrier(count)
+    engines = []
+    errors = []
+
+    def query():
+        try:
+            barrier.wait()
+            engines.append(context.manager.get_engine(con_name))
+            assert context.manager.recordset(con_name=con_name,
+                                             sql=sql).data
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(engines) == count
+    assert len(set(map(id, engines))) == 1
+    assert list(context.manager.connections) == [con_name]
+
+
 @then("we can reset the connections")
 def reset_connections_test(context):
     """Test resetting the connection."""
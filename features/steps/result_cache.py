@@ -0,0 +1,67 @@
+"""Steps testing the result cache."""
+
+import time
+
+from behave import when, then
+
+from features.steps.constants import TEST_TABLE_NAME
+
+CACHED_SQL = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+
+
+@when("we query {con_type} with a cache_ttl of {ttl:g} and the tag {tag}")
+def cached_query(context, con_type, ttl, tag):
+    """Query a connection, caching the result."""
+    context.cache_ttl = ttl
+    context.manager.recordset(con_name="my-{}-database".format(con_type),
+                              sql=CACHED_SQL, cache_ttl=ttl,
+                              cache_tags=[tag])
+
+
+@when("we change the cached result on {con_type}")
+def change_cached_result(context, con_type):
+    """Change the RecordSets of cache hits on a connection."""
+    for _ in range(2):
+        rst = context.manager.recordset(
+            con_name="my-{}-database".format(con_type), sql=CACHED_SQL,
+            cache_ttl=context.cache_ttl)
+        rst.data.append((3, "bar"))
+        rst.headings.append("extra")
+
+
+@when("we invalidate the tag {tag}")
+def invalidate_tag(context, tag):
+    """Invalidate the cached results with a tag."""
+    context.manager.invalidate_cache(tag=tag)
+
+
+@when("we invalidate the connection {con_type}")
+def invalidate_connection(context, con_type):
+    """Invalidate the cached results of a connection."""
+    context.manager.invalidate_cache(
+        con_name="my-{}-database".format(con_type))
+
+
+@when("we wait {seconds:g} seconds")
+def wait(context, seconds):
+    """Wait for a number of seconds."""
+    time.sleep(seconds)
+
+
+@then("the cached result on {con_type} has {count:d} entries")
+def cached_result_count(context, con_type, count):
+    """Test the number of entries in the cached result."""
+    rst = context.manager.recordset(
+        con_name="my-{}-database".format(con_type), sql=CACHED_SQL,
+        cache_ttl=context.cache_ttl)
+
+    assert len(rst.data) == count
+
+
+@then("the uncached result on {con_type} has {count:d} entries")
+def uncached_result_count(context, con_type, count):
+    """Test the number of entries in a result that bypasses the cache."""
+    rst = context.manager.recordset(
+        con_name="my-{}-database".format(con_type), sql=CACHED_SQL)
+
+    assert len(rst.data) == count
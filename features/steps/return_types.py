@@ -3,7 +3,9 @@
 from behave import given, when, then
 
 from features.steps.constants import TEST_TABLE_NAME
-from simqle.recordset import RecordSet, RecordScalar, Record
+from simqle.recordset import (
+    RecordSet, RecordView, RecordScalar, Record, ColumnarRecordSet,
+)
 from simqle.recordset.exceptions import UnknownHeadingError, NoScalarDataError
 
 
@@ -43,6 +45,31 @@ def recordset_method(context):
     for value, test_value in zip(rst.column("testfield"), ["foo", "1"]):
         assert value == test_value
 
+    # iterate over views of the records, sharing one heading index
+    views = list(rst.records())
+    assert all(isinstance(view, RecordView) for view in views)
+    assert [view["testfield"] for view in views] == ["foo", "1"]
+    assert views[0].get("Not a Column", "default") == "default"
+    assert [view.as_dict() for view in views] == correct_dicts
+    assert rst.index == {"id": 0, "testfield": 1}
+
+    # several columns are extracted in a single pass, and cached
+    assert rst.columns(["testfield", "id"]) == [["foo", "1"], [1, 2]]
+    assert rst.column("id") is not rst.column("id")
+
+    # select, filter and group the records
+    assert rst.select(["testfield"]).data == [("foo", ), ("1", )]
+    assert rst.where("testfield", "foo").data == [(1, "foo")]
+    assert rst.where("id", lambda value: value > 1).data == [(2, "1")]
+    assert not rst.where("id", 3)
+    groups = rst.group_by("testfield")
+    assert list(groups) == ["foo", "1"]
+    assert groups["1"].data == [(2, "1")]
+
+    # records are slotted, so have no per instance dict
+    assert not hasattr(rst, "__dict__")
+    assert not hasattr(views[0], "__dict__")
+
     # column with wrong column name raises the correct error
     try:
         _ = rst.column("Not a Column")
@@ -50,6 +77,17 @@ def recordset_method(context):
     except UnknownHeadingError:
         pass
 
+    # the records use the last of a repeated heading, as in a dict, and the
+    # column methods the first
+    rst = RecordSet(headings=["a", "a"], data=[(1, 2)])
+    assert rst.as_dict() == [{"a": 2}]
+    assert rst.column("a") == [1]
+    assert rst.select(["a"]).data == [(1, )]
+    view = next(rst.records())
+    assert view["a"] == 2
+    assert view.as_dict() == {"a": 2}
+    assert Record(headings=["a", "a"], data=[(1, 2)])["a"] == 2
+
 
 @then("we can return a Record")
 def record_method(context):
@@ -176,3 +214,39 @@ def empty_record_scalar_method(context):
     assert scalar.sdatum("bar") == "bar"
     assert scalar.sdatum() is None
 
+
+@then("we can return a ColumnarRecordSet")
+def columnar_recordset_method(context):
+    """Test the various ColumnarRecordSet methods"""
+    sql = """
+        SELECT id, testfield, id * 1.5 AS ratio, NULLIF(id, 1) AS nullable
+        FROM {}""".format(TEST_TABLE_NAME)
+    rst = context.manager.columnar_recordset(con_name="my-sqlite-database",
+                                             sql=sql, batch_size=1)
+
+    assert isinstance(rst, ColumnarRecordSet)
+    assert rst.headings == ["id", "testfield", "ratio", "nullable"]
+    assert bool(rst)
+    assert len(rst) == 2
+
+    # numeric columns are arrays of that type, with NULLs masked
+    assert rst.column("id").dtype.kind == "i"
+    assert rst.column("id").sum() == 3
+    assert rst.column("ratio").dtype.kind == "f"
+    assert list(rst.column("nullable").mask) == [True, False]
+    assert rst["nullable"].sum() == 2
+
+    # other columns are object arrays
+    assert rst.column("testfield").dtype.kind == "O"
+    assert list(rst.column("testfield")) == ["foo", "1"]
+
+    # rows are converted back to Python objects
+    assert list(rst) == [(1, "foo", 1.5, None), (2, "1", 3.0, 2)]
+    assert rst.as_dict()[0] == {"id": 1, "testfield": "foo", "ratio": 1.5,
+                                "nullable": None}
+
+    try:
+        _ = rst.column("Not a Column")
+        raise
+    except UnknownHeadingError:
+        pass
@@ -0,0 +1,227 @@
+"""Steps testing the streaming of results in batches."""
+
+from behave import then
+
+from features.steps.constants import TEST_TABLE_NAME
+from simqle.exceptions import PartitionError
+from simqle.recordset import (
+    ArrowRecordSet, RecordSet, StreamingRecordSet,
+)
+
+
+@then("we can stream a Recordset in batches of {batch_size:d}")
+def stream_recordset_method(context, batch_size):
+    """Test the various StreamingRecordSet methods."""
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    rst = context.manager.stream_recordset(con_name="my-sqlite-database",
+                                           sql=sql, batch_size=batch_size)
+
+    assert isinstance(rst, StreamingRecordSet)
+    assert rst.headings == ["id", "testfield"]
+    assert not rst.closed
+
+    batches = list(rst.batches())
+    assert batches == [[(1, "foo")], [(2, "1")]]
+    assert rst.row_count == 2
+
+    # exhausting the rows closes the connection
+    assert rst.closed
+    assert list(rst) == []
+
+    # iterate over dicts
+    rst = context.manager.stream_recordset(con_name="my-sqlite-database",
+                                           sql=sql)
+    assert list(rst.dict_gen()) == [
+        {"id": 1, "testfield": "foo"},
+        {"id": 2, "testfield": "1"},
+    ]
+    assert rst.closed
+
+
+@then("a StreamingRecordSet is closed when its block is exited")
+def stream_recordset_context_manager(context):
+    """Test that leaving a with block early closes the stream."""
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+
+    with context.manager.stream_recordset(con_name="my-sqlite-database",
+                                          sql=sql, batch_size=1) as rst:
+        assert next(iter(rst)) == (1, "foo")
+
+    assert rst.closed
+
+
+@then("we can return Recordsets in batches of {size:d}")
+def recordset_batches_method(context, size):
+    """Test that recordset_batches yields RecordSets of the right size."""
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    batches = list(context.manager.recordset_batches(
+        con_name="my-sqlite-database", sql=sql, size=size))
+
+    assert len(batches) == 2
+
+    for rst, correct_data in zip(batches, [[(1, "foo")], [(2, "1")]]):
+        assert isinstance(rst, RecordSet)
+        assert rst.headings == ["id", "testfield"]
+        assert rst.data == correct_data
+
+
+@then("we can return an Arrow table in batches of {batch_size:d}")
+def arrow_table_method(context, batch_size):
+    """Test that arrow_table returns a pyarrow Table."""
+    import pyarrow as pa
+
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    table = context.manager.arrow_table(con_name="my-sqlite-database",
+                                        sql=sql, batch_size=batch_size)
+
+    assert isinstance(table, pa.Table)
+    assert table.column_names == ["id", "testfield"]
+    assert table.to_pydict() == {"id": [1, 2], "testfield": ["foo", "1"]}
+
+    # an empty result still has its headings
+    table = context.manager.arrow_table(con_name="my-sqlite-database",
+                                        sql=sql + " WHERE id < 0")
+    assert table.column_names == ["id", "testfield"]
+    assert table.num_rows == 0
+
+    # a column that is all NULL in the first batch takes its type from a
+    # later batch
+    null_sql = ("SELECT id, CASE WHEN id > 1 THEN testfield END AS testfield "
+                "FROM {}".format(TEST_TABLE_NAME))
+    table = context.manager.arrow_table(con_name="my-sqlite-database",
+                                        sql=null_sql, batch_size=batch_size)
+    assert table.schema.field("testfield").type == pa.string()
+    assert table.to_pydict() == {"id": [1, 2], "testfield": [None, "1"]}
+
+
+@then("we can read Arrow record batches in batches of {batch_size:d}")
+def arrow_reader_method(context, batch_size):
+    """Test that arrow_reader streams pyarrow RecordBatches."""
+    import pyarrow as pa
+
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    schema = pa.schema([("id", pa.int32()), ("testfield", pa.string())])
+    reader = context.manager.arrow_reader(con_name="my-sqlite-database",
+                                          sql=sql, batch_size=batch_size,
+                                          schema=schema)
+
+    assert isinstance(reader, pa.RecordBatchReader)
+    assert reader.schema == schema
+
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [1, 1]
+    assert pa.Table.from_batches(batches).column("id").to_pylist() == [1, 2]
+
+    # without a schema, batches are read ahead until no column is all NULL
+    null_sql = ("SELECT id, CASE WHEN id > 1 THEN testfield END AS testfield "
+                "FROM {}".format(TEST_TABLE_NAME))
+    reader = context.manager.arrow_reader(con_name="my-sqlite-database",
+                                          sql=null_sql, batch_size=batch_size)
+    assert reader.schema.field("testfield").type == pa.string()
+    assert reader.read_all().column("testfield").to_pylist() == [None, "1"]
+
+
+@then("we can return a DataFrame with a categorical testfield")
+def dataframe_method(context):
+    """Test that dataframe applies dtypes to the returned DataFrame."""
+    import pandas as pd
+
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    frame = context.manager.dataframe(
+        con_name="my-sqlite-database", sql=sql,
+        dtypes={"id": "float64", "testfield": "category"})
+
+    assert isinstance(frame, pd.DataFrame)
+    assert list(frame.columns) == ["id", "testfield"]
+    assert frame["id"].dtype == "float64"
+    assert frame["testfield"].dtype == "category"
+    assert frame["testfield"].tolist() == ["foo", "1"]
+
+
+@then("we can return DataFrames in chunks of {chunksize:d}")
+def dataframe_chunks_method(context, chunksize):
+    """Test that dataframe returns chunks when a chunksize is given."""
+    import pandas as pd
+
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    chunks = list(context.manager.dataframe(
+        con_name="my-sqlite-database", sql=sql, chunksize=chunksize,
+        dtypes={"testfield": "category"}))
+
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert all(chunk["testfield"].dtype == "category" for chunk in chunks)
+
+    # categorical chunks are combined into a single categorical column
+    frame = context.manager.dataframe(con_name="my-sqlite-database",
+                                      sql=sql,
+                                      dtypes={"testfield": "category"})
+    assert frame["testfield"].dtype == "category"
+    assert frame.equals(pd.concat(chunks, ignore_index=True).astype(
+        {"testfield": "category"}))
+
+
+@then("we can return a Recordset fetched in {partitions:d} partitions")
+def recordset_parallel_method(context, partitions):
+    """Test that recordset_parallel returns the rows of every partition."""
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+    rst = context.manager.recordset_parallel(
+        sql, "my-sqlite-database", partition_by="id", partitions=partitions)
+
+    assert isinstance(rst, ArrowRecordSet)
+    assert rst.headings == ["id", "testfield"]
+
+    # columns are converted from the table without building the rows
+    assert rst.column("testfield") == ["1", "foo"]
+    assert rst._rows is None
+
+    # the rows are in the order of the partitions
+    assert rst.data == [(2, "1"), (1, "foo")]
+    assert [record["id"] for record in rst.records()] == [2, 1]
+
+    rst = context.manager.recordset_parallel(
+        sql + " WHERE id > 2", "my-sqlite-database", partition_by="id",
+        partitions=partitions)
+    assert not rst
+    assert rst.data is None
+
+    # params are passed to every partition
+    rst = context.manager.recordset_parallel(
+        sql + " WHERE testfield = :testfield", "my-sqlite-database",
+        partition_by="id", partitions=partitions,
+        params={"testfield": "foo"})
+    assert rst.data == [(1, "foo")]
+
+    try:
+        context.manager.recordset_parallel(sql, "my-sqlite-database",
+                                           partition_by="id")
+    except PartitionError:
+        pass
+    else:
+        raise AssertionError("PartitionError wasn't raised")
+
+
+@then("we can return an Arrow table fetched in ranges of id")
+def arrow_table_parallel_method(context):
+    """Test that recordset_parallel can split a query by ranges."""
+    import pyarrow as pa
+
+    sql = "SELECT id, testfield FROM {}".format(TEST_TABLE_NAME)
+
+    with context.manager.process_pool(max_workers=2) as process_pool:
+        table = context.manager.recordset_parallel(
+            sql, "my-sqlite-database", partition_by="id", boundaries=[2, 10],
+            as_table=True, process_pool=process_pool)
+
+    # the rows are in the order of the partitions, the last is empty
+    assert isinstance(table, pa.Table)
+    assert table.to_pydict() == {"id": [1, 2], "testfield": ["foo", "1"]}
+
+    # a partition whose first batch is all NULL takes the schema given
+    null_sql = ("SELECT id, CASE WHEN id > 1 THEN testfield END AS testfield "
+                "FROM {}".format(TEST_TABLE_NAME))
+    schema = pa.schema([("id", pa.int64()), ("testfield", pa.string())])
+    table = context.manager.recordset_parallel(
+        null_sql, "my-sqlite-database", partition_by="id", boundaries=[10],
+        as_table=True, batch_size=1, schema=schema, max_workers=1)
+    assert table.schema == schema
+    assert table.column("testfield").to_pylist() == [None, "1"]
@@ -0,0 +1,44 @@
+Feature: streaming results
+
+  As a SimQLe user
+  I want to be able to fetch large results in batches
+  So I don't have to hold every row in memory at once
+
+  @fixture.sqlite
+  Scenario: A StreamingRecordSet is returned
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then we can stream a Recordset in batches of 1
+    And a StreamingRecordSet is closed when its block is exited
+
+  @fixture.sqlite
+  Scenario: RecordSets are returned in batches
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then we can return Recordsets in batches of 1
+
+  @fixture.sqlite
+  Scenario: Results are returned as Arrow record batches
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then we can return an Arrow table in batches of 1
+    And we can read Arrow record batches in batches of 1
+
+  @fixture.sqlite
+  Scenario: Results are returned as pandas DataFrames
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then we can return a DataFrame with a categorical testfield
+    And we can return DataFrames in chunks of 1
+
+  @fixture.sqlite
+  Scenario: Results are fetched in partitions by separate processes
+    When we load the test connections file
+    And we create a table on sqlite
+    And we insert an entry on sqlite
+    Then we can return a Recordset fetched in 2 partitions
+    And we can return an Arrow table fetched in ranges of id
@@ -0,0 +1,3 @@
+SELECT id, testfield
+FROM testtable
+WHERE id = :id
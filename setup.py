@@ -18,6 +18,9 @@ EXTRAS_REQUIRE = {
     "mssqlserver": ["pyodbc"],
     "postgresql": ["psycopg2"],
     "mysql": ["pymysql"],
+    "numpy": ["numpy"],
+    "arrow": ["pyarrow"],
+    "pandas": ["pandas"],
 }
 
 setup(
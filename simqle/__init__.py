@@ -12,6 +12,7 @@ from simqle.internal import (
 )
 from simqle.helper import bind_sql
 from simqle.connection_manager import ConnectionManager
+from simqle.async_connection_manager import AsyncConnectionManager
 
 __all__ = [
     "recordset",
@@ -19,6 +20,7 @@ __all__ = [
     "execute_sql",
     "load_connections",
     "ConnectionManager",
+    "AsyncConnectionManager",
     "reset_connections",
     "get_engine",
     "bind_sql",
@@ -0,0 +1,150 @@
+"""Build Apache Arrow tables and record batches from query results."""
+
+
+def record_batches(headings, batches, schema=None):
+    """
+    Iterate over pyarrow RecordBatches built from lists of rows.
+
+    Each list of rows in <batches> is converted straight into one Arrow
+    column per heading. If no <schema> is given, the type of each column is
+    inferred from the first batch with a value in it, and kept for later
+    batches. Until then the column has the null type, so the schemas of the
+    batches can differ, see promote_batches.
+    """
+    pa = _import_pyarrow()
+
+    types = None if schema is None else schema.types
+
+    for batch in batches:
+        columns = list(zip(*batch))
+
+        if types is None:
+            types = [None] * len(headings)
+
+        # columns that have only been NULL so far are inferred again.
+        arrays = [pa.array(column) if pa.types.is_null(type_ or pa.null())
+                  else pa.array(column, type=type_)
+                  for column, type_ in zip(columns, types)]
+        types = [array.type for array in arrays]
+
+        yield pa.RecordBatch.from_arrays(arrays, schema=pa.schema(
+            [pa.field(heading, type_)
+             for heading, type_ in zip(headings, types)]))
+
+
+def promote_batches(arrow_batches):
+    """
+    Iterate over RecordBatches cast to the schema of the last of them.
+
+    The null columns of the earlier batches of record_batches are cast to
+    the type the column was given by a later batch.
+    """
+    pa = _import_pyarrow()
+
+    schema = arrow_batches[-1].schema
+
+    for batch in arrow_batches:
+        if batch.schema.equals(schema):
+            yield batch
+        else:
+            yield pa.RecordBatch.from_arrays(
+                [column if column.type == field.type
+                 else pa.nulls(len(column), type=field.type)
+                 for column, field in zip(batch.columns, schema)],
+                schema=schema)
+
+
+def table(headings, batches, schema=None):
+    """Return a pyarrow Table built batch by batch from lists of rows."""
+    pa = _import_pyarrow()
+
+    arrow_batches = list(record_batches(headings, batches, schema=schema))
+
+    if not arrow_batches:
+        return _empty_schema(pa, headings, schema).empty_table()
+
+    return pa.Table.from_batches(list(promote_batches(arrow_batches)))
+
+
+def record_batch_reader(headings, batches, schema=None):
+    """
+    Return a pyarrow RecordBatchReader over lists of rows.
+
+    Only the batches needed to find the schema are fetched, the first batch
+    unless a column of it is all NULL, in which case batches are read ahead
+    until the column has a value. The rest are fetched as the reader is
+    read.
+    """
+    pa = _import_pyarrow()
+
+    arrow_batches = record_batches(headings, batches, schema=schema)
+    first_batches = []
+
+    for batch in arrow_batches:
+        first_batches.append(batch)
+        if not any(pa.types.is_null(type_) for type_ in batch.schema.types):
+            break
+
+    if not first_batches:
+        return pa.RecordBatchReader.from_batches(
+            _empty_schema(pa, headings, schema), [])
+
+    def all_batches():
+        yield from promote_batches(first_batches)
+        yield from arrow_batches
+
+    return pa.RecordBatchReader.from_batches(first_batches[-1].schema,
+                                             all_batches())
+
+
+def to_ipc(arrow_table):
+    """Return a pyarrow Table serialised in the Arrow IPC stream format."""
+    pa = _import_pyarrow()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def from_ipc(stream):
+    """Return the pyarrow Table of an Arrow IPC stream."""
+    pa = _import_pyarrow()
+
+    return pa.ipc.open_stream(stream).read_all()
+
+
+def concat_tables(tables):
+    """
+    Return a pyarrow Table of the rows of <tables>, in order.
+
+    The schemas are merged, so a column that is all NULL in one table takes
+    its type from the others.
+    """
+    pa = _import_pyarrow()
+
+    try:
+        return pa.concat_tables(tables, promote_options="default")
+    except TypeError:
+        # pyarrow before 14.0 promotes with a flag instead.
+        return pa.concat_tables(tables, promote=True)
+
+
+def _empty_schema(pa, headings, schema=None):
+    """Return <schema>, or a schema of null columns if it isn't given."""
+    if schema is not None:
+        return schema
+
+    return pa.schema([pa.field(heading, pa.null()) for heading in headings])
+
+
+def _import_pyarrow():
+    """Import pyarrow, which is only required for Arrow results."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Arrow results, install it "
+                          "with pip install pyarrow") from e
+
+    return pyarrow
@@ -0,0 +1,158 @@
+"""Defines the AsyncConnectionManager and AsyncConnection Classes."""
+
+from time import perf_counter
+
+from simqle.connection_manager import _BaseConnectionManager, _Connection
+from simqle.constants import DEFAULT_STATEMENT_CACHE_SIZE
+from simqle.helper import StatementCache
+from simqle.recordset import RecordSet, RecordScalar, Record
+from simqle.logging import QueryLogger
+
+
+class AsyncConnectionManager(_BaseConnectionManager):
+    """
+    The Async Connection Manager Class.
+
+    Mirrors the ConnectionManager, using the same connections file, modes and
+    default connection, but the methods that execute sql and return
+    recordsets are coroutines run on sqlalchemy's asyncio engines:
+
+        cm = AsyncConnectionManager(".connections.yaml")
+        rst = await cm.recordset(sql, con_name="my-database")
+
+    Each connection needs an async driver, such as sqlite+aiosqlite:/// or
+    postgresql+asyncpg://. This can be given in the async_driver option of
+    the connection so the same connection can also be used by a
+    ConnectionManager.
+    """
+
+    def __init__(self, file_name=None,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE,
+                 query_logger=None):
+        """
+        Initialise an AsyncConnectionManager.
+
+        Connections are loaded lazily as required, only the config is loaded
+        on initialisation. Queries are logged by <query_logger>, see
+        ConnectionManager.
+        """
+        self.statement_cache = StatementCache(maxsize=statement_cache_size)
+        self.query_logger = query_logger or QueryLogger()
+        super().__init__(file_name)
+
+    # --- Public Methods: ---
+
+    async def recordset(self, sql, con_name=None, params=None):
+        headings, data = await self._recordset(sql, con_name, params=params)
+        return RecordSet(headings=headings, data=data)
+
+    async def record_scalar(self, sql, con_name=None, params=None):
+        headings, data = await self._recordset(sql, con_name, params=params)
+        return RecordScalar(headings=headings, data=data)
+
+    async def record(self, sql, con_name=None, params=None):
+        headings, data = await self._recordset(sql, con_name, params=params)
+        return Record(headings=headings, data=data)
+
+    async def execute_sql(self, sql, con_name=None, params=None):
+        """Execute SQL on a given connection."""
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+        await connection.execute_sql(sql, params=params)
+        self.query_logger.log("Execution", con_name, sql, params,
+                              perf_counter() - start_time)
+
+    async def dispose(self):
+        """
+        Dispose of the engines of all current connections.
+
+        Async engines hold connections bound to the running event loop, so
+        this should be awaited before the event loop is closed.
+        """
+        for connection in self.connections.values():
+            await connection.dispose()
+
+        self.reset_connections()
+
+    # --- Private Methods: ---
+
+    async def _recordset(self, sql, con_name=None, params=None):
+        """Return headings and data from a connection."""
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+        rst = await connection.recordset(sql, params=params)
+        self.query_logger.log("Query", con_name, sql, params,
+                              perf_counter() - start_time)
+
+        return rst
+
+    def _new_connection(self, conn_config):
+        """Return a new _AsyncConnection sharing the statement cache."""
+        return _AsyncConnection(conn_config,
+                                statement_cache=self.statement_cache)
+
+
+class _AsyncConnection(_Connection):
+    """
+    The _AsyncConnection class.
+
+    This represents a single connection on an asyncio engine, which is
+    lazily loaded the first time either execute_sql or recordset is awaited.
+
+    This class shouldn't be loaded outside the AsyncConnectionManager class,
+    and so is marked as internal only.
+    """
+
+    def __init__(self, conn_config, statement_cache=None):
+        """Create a new AsyncConnection from a config dict."""
+        super().__init__(conn_config, statement_cache=statement_cache)
+
+        # The same connection can define the async driver to use alongside
+        # the driver used by the ConnectionManager.
+        self.driver = conn_config.get('async_driver', self.driver)
+
+    def _connect(self):
+        """Create an engine based on sqlalchemy's create_async_engine."""
+        # sqlalchemy.ext.asyncio only exists from sqlalchemy 1.4, so it is
+        # only imported when an async engine is actually required.
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        self._engine = create_async_engine(
+            self.driver + self.connection_string, **self.engine_options)
+
+    @property
+    def _sync_engine(self):
+        """Return the sync engine that owns the async engine's pool."""
+        return self._engine.sync_engine
+
+    async def execute_sql(self, sql, params=None):
+        """Execute :sql: on this connection with named :params:."""
+        prepared_sql = self.statement_cache.prepare(sql, params)
+
+        # the transaction is committed, or rolled back on error, when the
+        # block is exited.
+        async with self.engine.begin() as connection:
+            await connection.execute(prepared_sql, params or {})
+
+    async def recordset(self, sql, params=None):
+        """
+        Execute <sql> on <con>, with named <params>.
+
+        Return (headings, data)
+        """
+        prepared_sql = self.statement_cache.prepare(sql, params)
+
+        async with self.engine.begin() as connection:
+            result = await connection.execute(prepared_sql, params or {})
+            data = result.fetchall()
+            headings = list(result.keys())
+
+        return headings, data
+
+    async def dispose(self):
+        """Dispose of the engine's connection pool if it has been loaded."""
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
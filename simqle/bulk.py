@@ -0,0 +1,258 @@
+"""Load rows into a table using the fastest method of each database."""
+
+import os
+import tempfile
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+from itertools import chain
+
+from sqlalchemy import text
+
+from simqle.constants import DEFAULT_BATCH_SIZE
+from simqle.exceptions import BulkLoadError
+from simqle.helper import iter_batches
+
+# The fastest method of loading rows into each dialect, used by method="auto".
+AUTO_METHODS = {
+    "postgresql": "copy",
+    "mysql": "load_data",
+    "mssql": "fast_executemany",
+}
+
+
+def bulk_load(connection, table, rows, columns=None, method="auto",
+              batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load <rows> into <table> on an open sqlalchemy connection.
+
+    The rows are loaded in a single transaction, which is rolled back if any
+    row fails to load.
+
+    <rows> is any iterable of tuples in the order of <columns>, or of dicts,
+    in which case <columns> defaults to the keys of the first dict. It is
+    consumed lazily, so can be a generator.
+
+    The <method> is one of:
+        copy: PostgreSQL COPY FROM STDIN (psycopg2 only)
+        load_data: MySQL/MariaDB LOAD DATA LOCAL INFILE
+        fast_executemany: pyodbc executemany with fast_executemany
+        executemany: batches of <batch_size> rows with executemany
+        auto: the fastest of these for the connection's dialect
+
+    Return the number of rows loaded.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+
+    if isinstance(first_row, Mapping):
+        columns = columns or list(first_row.keys())
+        rows = (tuple(row[column] for column in columns)
+                for row in chain([first_row], rows))
+    else:
+        rows = chain([first_row], rows)
+
+    if not columns:
+        raise BulkLoadError("columns must be given when the rows are not "
+                            "dicts")
+
+    dialect = connection.dialect
+    if method == "auto":
+        method = AUTO_METHODS.get(dialect.name, "executemany")
+
+        # COPY is only available through psycopg2's copy_expert.
+        if method == "copy" and dialect.driver != "psycopg2":
+            method = "executemany"
+
+    loaders = {
+        "copy": _copy,
+        "load_data": _load_data,
+        "fast_executemany": _fast_executemany,
+        "executemany": _executemany,
+    }
+
+    if method not in loaders:
+        raise BulkLoadError("{} is an unknown bulk load method".format(method))
+
+    preparer = dialect.identifier_preparer
+    quoted_table = ".".join(preparer.quote(part)
+                            for part in table.split("."))
+    quoted_columns = ", ".join(preparer.quote(column) for column in columns)
+
+    with _sqlite_pragmas(connection):
+        transaction = connection.begin()
+
+        # load the rows, and rollback on error
+        try:
+            row_count = loaders[method](connection, quoted_table,
+                                        quoted_columns, len(columns), rows,
+                                        batch_size)
+            transaction.commit()
+
+        except Exception as exception:
+            transaction.rollback()
+            raise exception
+
+    return row_count
+
+
+@contextmanager
+def _sqlite_pragmas(connection):
+    """
+    Turn off SQLite's synchronous writes while the rows are loaded.
+
+    The previous setting is restored afterwards. Other dialects are left
+    unchanged.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+
+    synchronous = connection.execute(text("PRAGMA synchronous")).scalar()
+    connection.execute(text("PRAGMA synchronous = OFF"))
+
+    try:
+        yield
+    finally:
+        connection.execute(text("PRAGMA synchronous = {:d}".format(
+            synchronous)))
+
+
+def _copy(connection, table, columns, column_count, rows, batch_size):
+    """Load the rows with PostgreSQL's COPY FROM STDIN in csv format."""
+    if connection.dialect.driver != "psycopg2":
+        raise BulkLoadError("The copy bulk load method requires psycopg2")
+
+    stream = _CsvStream(rows, null="")
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(table, columns)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(sql, stream)
+    finally:
+        cursor.close()
+
+    return stream.row_count
+
+
+def _load_data(connection, table, columns, column_count, rows, batch_size):
+    """
+    Load the rows with MySQL's LOAD DATA LOCAL INFILE.
+
+    The rows are written to a temporary csv file first, so they are never
+    all held in memory. The local_infile connect arg must be set.
+    """
+    stream = _CsvStream(rows, null="NULL")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8",
+                                     delete=False) as file:
+        for line in stream.lines:
+            file.write(line)
+
+    try:
+        connection.execute(text(
+            "LOAD DATA LOCAL INFILE :file_name INTO TABLE {} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            "ESCAPED BY '' LINES TERMINATED BY '\\n' ({})".format(
+                table, columns)),
+            {"file_name": file.name})
+    finally:
+        os.remove(file.name)
+
+    return stream.row_count
+
+
+def _fast_executemany(connection, table, columns, column_count, rows,
+                      batch_size):
+    """Load the rows with pyodbc's executemany with fast_executemany."""
+    if connection.dialect.driver != "pyodbc":
+        raise BulkLoadError("The fast_executemany bulk load method requires "
+                            "pyodbc")
+
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        table, columns, ", ".join(["?"] * column_count))
+    row_count = 0
+
+    cursor = connection.connection.cursor()
+    cursor.fast_executemany = True
+
+    try:
+        for batch in iter_batches(rows, batch_size):
+            cursor.executemany(sql, batch)
+            row_count += len(batch)
+    finally:
+        cursor.close()
+
+    return row_count
+
+
+def _executemany(connection, table, columns, column_count, rows,
+                 batch_size):
+    """Load the rows in batches with the driver's executemany."""
+    keys = ["p{}".format(index) for index in range(column_count)]
+    statement = text("INSERT INTO {} ({}) VALUES ({})".format(
+        table, columns, ", ".join(":" + key for key in keys)))
+    row_count = 0
+
+    for batch in iter_batches(rows, batch_size):
+        connection.execute(statement, [dict(zip(keys, row)) for row in batch])
+        row_count += len(batch)
+
+    return row_count
+
+
+class _CsvStream:
+    """
+    A readable file-like object of rows formatted as csv lines.
+
+    NULLs are written as the unquoted <null> token and every other
+    non-numeric value is quoted, so empty strings aren't read as NULL.
+    """
+
+    def __init__(self, rows, null):
+        self.row_count = 0
+        self.lines = self._lines(rows, null)
+        self._buffer = ""
+
+    def _lines(self, rows, null):
+        for row in rows:
+            self.row_count += 1
+            yield ",".join(_csv_value(value, null) for value in row) + "\n"
+
+    def read(self, size=-1):
+        """Return up to <size> characters, or every remaining character."""
+        if size is None or size < 0:
+            data = self._buffer + "".join(self.lines)
+            self._buffer = ""
+            return data
+
+        while len(self._buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self._buffer += line
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        """Return the next line."""
+        if self._buffer:
+            return self.read(self._buffer.find("\n") + 1 or len(self._buffer))
+
+        return next(self.lines, "")
+
+
+def _csv_value(value, null):
+    """Format a single value for a csv line."""
+    if value is None:
+        return null
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+
+    return '"' + str(value).replace('"', '""') + '"'
@@ -0,0 +1,145 @@
+"""Defines the ResultCache used to cache the results of read-only queries."""
+
+import sys
+import time
+
+from collections import OrderedDict
+from threading import Lock
+
+from simqle.constants import DEFAULT_RESULT_CACHE_ENTRIES
+
+
+class ResultCache:
+    """
+    A least recently used cache of query results, each with a time to live.
+
+    Results are keyed on the connection name, the SQL and the params of the
+    query. Entries expire after their time to live, and the least recently
+    used entries are evicted once there are more than <max_entries> entries,
+    or the results take more than an estimated <max_bytes> of memory.
+
+    Entries can be invalidated by connection name, or by any of the tags
+    they were cached with.
+    """
+
+    def __init__(self, max_entries=DEFAULT_RESULT_CACHE_ENTRIES,
+                 max_bytes=None):
+        """Initialise an empty cache."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(con_name, sql, params=None):
+        """
+        Return the cache key of a query.
+
+        Return None if the params can't be hashed, in which case the query
+        can't be cached.
+        """
+        params_key = tuple(sorted(params.items())) if params else ()
+
+        try:
+            hash(params_key)
+        except TypeError:
+            return None
+
+        return con_name, sql, params_key
+
+    def get(self, key):
+        """Return the cached result of <key>, or None if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+    def set(self, key, result, ttl, tags=None):
+        """Cache <result> under <key> for <ttl> seconds with any <tags>."""
+        size = result_size(result) if self.max_bytes else 0
+
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        entry = _CacheEntry(result, time.monotonic() + ttl, size, tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self.size += size
+
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes and self.size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, con_name=None, tag=None):
+        """
+        Remove the entries of a connection, or with a tag, or both.
+
+        If neither <con_name> nor <tag> are given, every entry is removed.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if con_name is not None and key[0] != con_name:
+                    continue
+                if tag is not None and tag not in entry.tags:
+                    continue
+
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, key):
+        """Remove an entry, the lock must already be held."""
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+
+class _CacheEntry:
+    """A cached result with its expiry time, estimated size and tags."""
+
+    __slots__ = ("result", "expires_at", "size", "tags")
+
+    def __init__(self, result, expires_at, size, tags=None):
+        self.result = result
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = frozenset(tags or ())
+
+
+def result_size(result):
+    """Estimate the memory used by a (headings, data) result in bytes."""
+    headings, data = result
+    size = sys.getsizeof(headings) + sys.getsizeof(data)
+
+    for record in data or []:
+        size += sys.getsizeof(record)
+        size += sum(sys.getsizeof(value) for value in record)
+
+    return size
@@ -1,34 +1,57 @@
 """Defines the ConnectionManager and Connection Classes."""
 
 import os
-import time
-import uuid
+import re
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import partial
+from heapq import merge
+from itertools import islice
+from threading import Lock
+from time import perf_counter
 
 from yaml import safe_load
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, pool
+from sqlalchemy.exc import InterfaceError, OperationalError
 
 from urllib.parse import quote_plus
-from simqle.constants import DEFAULT_FILE_LOCATIONS, DEV_MAP
+from simqle.constants import (
+    DEFAULT_FILE_LOCATIONS, DEV_MAP, DEFAULT_BATCH_SIZE,
+    FAST_EXECUTEMANY_OPTIONS, DEFAULT_STATEMENT_CACHE_SIZE, POOL_OPTIONS,
+    POOL_CLASSES, DEFAULT_RESULT_CACHE_ENTRIES, DEFAULT_SLOW_QUERY_ENTRIES,
+    DEFAULT_REPLICA_RETRY_INTERVAL,
+)
 from simqle.exceptions import (
     NoConnectionsFileError, UnknownConnectionError,
     MultipleDefaultConnectionsError, EnvironSyncError, UnknownSimqleMode,
-    NoDefaultConnectionError,
+    NoDefaultConnectionError, UnknownPoolOptionError, ConcurrentQueryError,
+    EmptyShardGroupError, QueryConfigError,
+)
+from simqle import arrow, bulk, frames
+from simqle.cache import ResultCache, result_size
+from simqle.helper import StatementCache, iter_batches, run_concurrently
+from simqle.instrumentation import Instrumentation
+from simqle.recordset import (
+    RecordSet, RecordScalar, Record, StreamingRecordSet, ColumnarRecordSet,
+    ArrowRecordSet,
 )
-from simqle.helper import bind_sql
-from simqle.recordset import RecordSet, RecordScalar, Record
-from simqle.logging import logger as log
+from simqle.recordset.exceptions import UnknownHeadingError
+from simqle.logging import logger as log, QueryLogger
+from simqle.processes import QueryProcessPool, partition_queries
+from simqle.queries import QueryRegistry
+from simqle.replicas import ReplicaSet, replica_configs
+from simqle.slow_queries import SlowQueryLog
 
 
-class ConnectionManager:
+class _BaseConnectionManager(ABC):
     """
-    The Connection Manager Class.
+    The base of the Connection Manager Classes.
 
-    Create an instance of this class with a yaml configuration file. If no
-    yaml file is given, the first connection file found in default locations
-    will be used instead.
-
-    This is the class from which you execute sql and return recordsets, using
-    the public methods self.execute_sql and self.recordset.
+    Loads the connections config, checks the default connection settings and
+    creates connection objects lazily by name. The subclasses define how the
+    connection objects are created, with _new_connection, and the public
+    methods that use them.
     """
 
     def __init__(self, file_name=None):
@@ -39,14 +62,15 @@ class ConnectionManager:
         on initialisation.
         """
         self.connections = {}
+        self._connections_lock = Lock()
 
         # For backwards compatibility, test mode is given precedence
         if isinstance(os.getenv("SIMQLE_TEST"), str) and os.getenv(
                 "SIMQLE_TEST").lower() == "true":
 
-            log.warn("ConnectionManager set to dev mode because SIMQLE_TEST "
-                     "is set. SIMQLE_TEST is deprecated, please use "
-                     "SIMQLE_MODE instead.")
+            log.warning("ConnectionManager set to dev mode because "
+                        "SIMQLE_TEST is set. SIMQLE_TEST is deprecated, "
+                        "please use SIMQLE_MODE instead.")
 
             self.dev_mode = "testing"
             self.dev_type = "test-connections"
@@ -54,7 +78,7 @@ class ConnectionManager:
         else:
             self.dev_mode = os.getenv("SIMQLE_MODE", "production")
 
-            log.info(f"ConnectionManager is set to {self.dev_mode} mode")
+            log.info("ConnectionManager is set to %s mode", self.dev_mode)
 
             self.dev_type = DEV_MAP.get(self.dev_mode)
 
@@ -65,6 +89,7 @@ class ConnectionManager:
 
         self._default_connection_name = None
         self.config = None
+        self.config_file = None
 
         if not file_name:
             # file_name isn't given so we search through the possible default
@@ -72,9 +97,10 @@ class ConnectionManager:
             for default_file_name in DEFAULT_FILE_LOCATIONS:
                 try:
                     self.config = self._load_yaml_file(default_file_name)
+                    self.config_file = default_file_name
 
-                    log.info(f"The connections file was loaded from "
-                             f"{default_file_name}")
+                    log.info("The connections file was loaded from %s",
+                             default_file_name)
                     break
 
                 except FileNotFoundError:
@@ -89,45 +115,49 @@ class ConnectionManager:
             if isinstance(file_name, dict):
                 self.config = file_name
 
-                log.info(f"The connections file was loaded from a dict:"
-                         f"{file_name}")
+                # the dict isn't logged, as it can contain passwords.
+                log.info("The connections file was loaded from a dict")
             else:
                 self.config = self._load_yaml_file(file_name)
+                self.config_file = file_name
 
-                log.info(f"The connections file was loaded from "
-                         f"{file_name}")
+                log.info("The connections file was loaded from %s",
+                         file_name)
 
         self._check_default_connections()
 
-    # --- Public Methods: ---
-
-    def recordset(self, sql, con_name=None, params=None):
-        headings, data = self._recordset(sql, con_name, params=params)
-        return RecordSet(headings=headings, data=data)
-
-    def record_scalar(self, sql, con_name=None, params=None):
-        headings, data = self._recordset(sql, con_name, params=params)
-        return RecordScalar(headings=headings, data=data)
-
-    def record(self, sql, con_name=None, params=None):
-        headings, data = self._recordset(sql, con_name, params=params)
-        return Record(headings=headings, data=data)
-
-    def execute_sql(self, sql, con_name=None, params=None):
-        """Execute SQL on a given connection."""
-        execute_id = uuid.uuid4()
-
-        log.info(f"Execution started on {con_name} with id={execute_id}, "
-                 f"params={params}, sql={sql}")
-
-        start_time = time.time()
-        con_name = self._con_name(con_name)
-        connection = self._get_connection(con_name)
-        connection.execute_sql(sql, params=params)
-        elapsed_time = time.time() - start_time
+        # Index the connection configs of the current mode by name, so
+        # connections can be found without scanning the config. Shard groups
+        # are only names of other connections, so are indexed separately.
+        # Read replicas are indexed as connections of their own too.
+        self._connection_configs = {}
+        self._shard_groups = {}
+        self._replica_names = {}
+        self._replica_sets = {}
+        for conn_config in self.config.get(self.dev_type) or []:
+            if "shards" in conn_config:
+                if not conn_config["shards"]:
+                    raise EmptyShardGroupError(
+                        "The shard group {} has no shards".format(
+                            conn_config["name"]))
+
+                self._shard_groups.setdefault(conn_config["name"],
+                                              list(conn_config["shards"]))
+                continue
+
+            self._connection_configs.setdefault(conn_config["name"],
+                                                conn_config)
+
+            if conn_config.get("replicas"):
+                configs = replica_configs(conn_config)
+                self._replica_names.setdefault(
+                    conn_config["name"],
+                    [config["name"] for config in configs])
+                for config in configs:
+                    self._connection_configs.setdefault(config["name"],
+                                                        config)
 
-        log.info(f"Execution id {execute_id} took {elapsed_time:.4f} seconds "
-                 f"to complete")
+    # --- Public Methods: ---
 
     def get_engine(self, con_name=None):
         """Return the engine of a Connection by it's name."""
@@ -144,29 +174,17 @@ class ConnectionManager:
         return self.get_engine(con_name)  # TODO: add warning
 
     def reset_connections(self):
-        """Remove all current connection objects."""
-        self.connections = {}
-        self._default_connection_name = None
-
-    # --- Private Methods: ---
-
-    def _recordset(self, sql, con_name=None, params=None):
-        """Return headings and data from a connection."""
-        recordset_id = uuid.uuid4()
-
-        log.info(f"Query started on {con_name} with id={recordset_id}, "
-                 f"params={params}, sql={sql}")
-
-        start_time = time.time()
-        con_name = self._con_name(con_name)
-        connection = self._get_connection(con_name)
-        rst = connection.recordset(sql, params=params)
-        elapsed_time = time.time() - start_time
+        """
+        Remove all current connection objects.
 
-        log.info(f"Query id {recordset_id} took {elapsed_time:.4f} seconds "
-                 f"to complete")
+        The config, including the default connection, is unchanged, so the
+        connections are recreated the next time they are used.
+        """
+        with self._connections_lock:
+            self.connections = {}
+            self._replica_sets = {}
 
-        return rst
+    # --- Private Methods: ---
 
     @staticmethod
     def _load_yaml_file(connections_file):
@@ -179,19 +197,58 @@ class ConnectionManager:
         Return a connection object from its name.
 
         Connection objects are created and saved the first time they are
-        called.
+        called. This is safe to call from several threads: only one
+        connection object is ever created per name, and once it exists it is
+        returned without taking a lock.
         """
         # Return already initialised connection if it exists.
-        if con_name in self.connections:
-            return self.connections[con_name]
-
-        # A new Connection instance is required.
-        for conn_config in self.config[self.dev_type]:
-            if conn_config["name"] == con_name:
-                self.connections[con_name] = _Connection(conn_config)
-                return self.connections[con_name]
+        connection = self.connections.get(con_name)
+        if connection is not None:
+            return connection
+
+        conn_config = self._connection_configs.get(con_name)
+        if conn_config is None:
+            raise UnknownConnectionError(
+                "Unknown connection {}".format(con_name))
+
+        # A new Connection instance is required. Threads that were waiting
+        # on the lock use the instance created by the first thread.
+        with self._connections_lock:
+            connection = self.connections.get(con_name)
+            if connection is None:
+                connection = self._new_connection(conn_config)
+                self.connections[con_name] = connection
+
+        return connection
+
+    def _replica_set(self, con_name):
+        """
+        Return the ReplicaSet of a connection, or None if it has no replicas.
 
-        raise UnknownConnectionError("Unknown connection {}".format(con_name))
+        Like connections, each ReplicaSet is created the first time it is
+        used.
+        """
+        replica_set = self._replica_sets.get(con_name)
+        if replica_set is not None or con_name not in self._replica_names:
+            return replica_set
+
+        conn_config = self._connection_configs[con_name]
+        replicas = [self._get_connection(replica_name)
+                    for replica_name in self._replica_names[con_name]]
+
+        with self._connections_lock:
+            replica_set = self._replica_sets.get(con_name)
+            if replica_set is None:
+                replica_set = ReplicaSet(
+                    replicas,
+                    strategy=conn_config.get("replica_strategy",
+                                             "round_robin"),
+                    retry_interval=conn_config.get(
+                        "replica_retry_interval",
+                        DEFAULT_REPLICA_RETRY_INTERVAL))
+                self._replica_sets[con_name] = replica_set
+
+        return replica_set
 
     def _check_default_connections(self):
         """Check that default settings are set correctly."""
@@ -202,8 +259,8 @@ class ConnectionManager:
                 number_of_defaults += 1
                 self._default_connection_name = connection.get("name")
 
-                log.info(f"Setting the default connection to "
-                         f"{connection.get('name')}")
+                log.info("Setting the default connection to %s",
+                         connection.get("name"))
 
         if not number_of_defaults:
             return
@@ -235,6 +292,725 @@ class ConnectionManager:
                                            "but no default connection exists.")
         return self._default_connection_name
 
+    @abstractmethod
+    def _new_connection(self, conn_config):
+        """Return a new connection object from a connection config dict."""
+
+
+class ConnectionManager(_BaseConnectionManager):
+    """
+    The Connection Manager Class.
+
+    Create an instance of this class with a yaml configuration file. If no
+    yaml file is given, the first connection file found in default locations
+    will be used instead.
+
+    This is the class from which you execute sql and return recordsets, using
+    the public methods self.execute_sql and self.recordset.
+    """
+
+    def __init__(self, file_name=None,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE,
+                 result_cache_entries=DEFAULT_RESULT_CACHE_ENTRIES,
+                 result_cache_bytes=None, measure_bytes=False,
+                 query_logger=None,
+                 slow_query_entries=DEFAULT_SLOW_QUERY_ENTRIES):
+        """
+        Initialise a ConnectionManager.
+
+        Connections are loaded lazily as required, only the config is loaded
+        on initialisation.
+
+        Prepared queries are shared by all connections in a cache of
+        <statement_cache_size> queries, see self.statement_cache for its hit
+        and miss counts.
+
+        Results of queries that are cached are kept in self.result_cache,
+        holding at most <result_cache_entries> results and, if given, an
+        estimated <result_cache_bytes> bytes.
+
+        Hooks added to self.instrumentation are called with the timings of
+        each query, including the estimated size of the rows returned if
+        <measure_bytes> is True.
+
+        Queries are logged by <query_logger>, a QueryLogger which by default
+        logs at INFO level with the values of the params redacted.
+
+        Queries slower than the slow_query_threshold of their connection are
+        kept in self.slow_query_log, which holds the most recent
+        <slow_query_entries> slow queries.
+        """
+        self.statement_cache = StatementCache(maxsize=statement_cache_size)
+        self.result_cache = ResultCache(max_entries=result_cache_entries,
+                                        max_bytes=result_cache_bytes)
+        self.instrumentation = Instrumentation(measure_bytes=measure_bytes)
+        self.query_logger = query_logger or QueryLogger()
+        super().__init__(file_name)
+
+        # queries are only timed for the slow query log if a connection has
+        # a threshold.
+        self.slow_query_log = SlowQueryLog(self,
+                                           max_entries=slow_query_entries)
+        if any("slow_query_threshold" in conn_config
+               for conn_config in self._connection_configs.values()):
+            self.instrumentation.add_hook(self.slow_query_log)
+
+        # named queries are loaded and checked once, so run doesn't parse
+        # them again.
+        base_dir = os.path.dirname(self.config_file or "")
+        self.queries = QueryRegistry(self.config.get("queries"),
+                                     base_dir=base_dir)
+        for query in self.queries.queries.values():
+            if query.con_name is not None and (
+                    query.con_name not in self._connection_configs):
+                raise QueryConfigError("Query {} has an unknown connection "
+                                       "{}".format(query.name,
+                                                   query.con_name))
+
+    # --- Public Methods: ---
+
+    def recordset(self, sql, con_name=None, params=None, cache_ttl=None,
+                  cache_tags=None):
+        headings, data = self._recordset(sql, con_name, params=params,
+                                         cache_ttl=cache_ttl,
+                                         cache_tags=cache_tags)
+        return RecordSet(headings=headings, data=data)
+
+    def record_scalar(self, sql, con_name=None, params=None, cache_ttl=None,
+                      cache_tags=None):
+        headings, data = self._recordset(sql, con_name, params=params,
+                                         cache_ttl=cache_ttl,
+                                         cache_tags=cache_tags)
+        return RecordScalar(headings=headings, data=data)
+
+    def record(self, sql, con_name=None, params=None, cache_ttl=None,
+               cache_tags=None):
+        headings, data = self._recordset(sql, con_name, params=params,
+                                         cache_ttl=cache_ttl,
+                                         cache_tags=cache_tags)
+        return Record(headings=headings, data=data)
+
+    def run(self, name, params=None):
+        """
+        Run a named query from the queries section of the connections file.
+
+        The query is run on its connection, and returns its return type: a
+        RecordSet, Record or RecordScalar, or None if it is executed. A
+        QueryParamsError is raised unless <params> are exactly the params
+        of the query.
+        """
+        query = self.queries.get(name)
+        query.check_params(params)
+
+        if query.returns == "execute":
+            return self.execute_sql(query.sql, query.con_name, params=params)
+
+        return getattr(self, query.returns)(query.sql, query.con_name,
+                                            params=params)
+
+    def recordset_many(self, queries, max_workers=None, timeout=None,
+                       return_exceptions=False):
+        """
+        Return the RecordSets of independent queries run concurrently.
+
+        <queries> is a list of (sql, con_name, params) tuples, where con_name
+        and params can be left out. The queries are run on a pool of
+        <max_workers> threads, each with its own pooled connection, and the
+        RecordSets are returned in the order of <queries>.
+
+        A query that doesn't complete within <timeout> seconds has a
+        QueryTimeoutError. If any query fails a ConcurrentQueryError is
+        raised once every query has finished, with the errors by index of
+        query in its errors attribute. If <return_exceptions> is True, the
+        exceptions are returned in place of those RecordSets instead.
+        """
+        calls = [partial(self.recordset, *query) for query in queries]
+
+        outcomes = run_concurrently(calls, max_workers=max_workers,
+                                    timeout=timeout)
+        results = [exception or result for result, exception in outcomes]
+
+        if return_exceptions:
+            return results
+
+        errors = {index: exception
+                  for index, (_, exception) in enumerate(outcomes)
+                  if exception is not None}
+
+        if errors:
+            index, error = next(iter(errors.items()))
+            raise ConcurrentQueryError(
+                "{} of {} queries failed, query {} with: {}".format(
+                    len(errors), len(outcomes), index, error),
+                errors=errors, results=results)
+
+        return results
+
+    def recordset_sharded(self, sql, group, params=None, order_by=None,
+                          descending=False, limit=None, max_workers=None,
+                          timeout=None, nulls_last=False):
+        """
+        Return a RecordSet of a query run on every shard of a shard group.
+
+        The query is run on each connection of the <group> at the same time,
+        as with recordset_many, and the rows of the shards are combined in
+        the order of the shards. If any shard fails, a ConcurrentQueryError
+        is raised.
+
+        If <order_by> is given, a heading or list of headings, the rows are
+        merged in that order instead, which the <sql> must also order each
+        shard by, <descending> if it orders them descending. NULLs are
+        ordered before every value, as on MySQL and SQLite, so first, or
+        last when descending. If <nulls_last> is True they are ordered after
+        every value instead, as on PostgreSQL and Oracle. The rows are
+        merged out of order if this doesn't match how the shards order them.
+
+        If <limit> is given, at most <limit> rows are returned. It is also
+        pushed down to each shard if the <sql> has a :limit param, such as
+        ORDER BY created_at LIMIT :limit.
+        """
+        shards = self._shard_groups.get(group)
+        if shards is None:
+            raise UnknownConnectionError(
+                "Unknown shard group {}".format(group))
+
+        if limit is not None and _LIMIT_PARAM.search(sql):
+            params = dict(params or {}, limit=limit)
+
+        outcomes = run_concurrently(
+            [partial(self._recordset, sql, shard, params=params)
+             for shard in shards],
+            max_workers=max_workers or len(shards), timeout=timeout)
+
+        errors = {index: exception
+                  for index, (_, exception) in enumerate(outcomes)
+                  if exception is not None}
+
+        if errors:
+            index, error = next(iter(errors.items()))
+            raise ConcurrentQueryError(
+                "{} of {} shards of {} failed, {} with: {}".format(
+                    len(errors), len(shards), group, shards[index], error),
+                errors=errors, results=[rst for rst, _ in outcomes])
+
+        headings = outcomes[0][0][0]
+        shard_data = [data for (_, data), _ in outcomes]
+
+        if order_by is None:
+            rows = (row for data in shard_data for row in data)
+
+        else:
+            if isinstance(order_by, str):
+                order_by = [order_by]
+
+            try:
+                indexes = [headings.index(heading) for heading in order_by]
+            except ValueError as e:
+                raise UnknownHeadingError(order_by) from e
+
+            def sort_key(row):
+                return [((row[index] is None) == nulls_last, row[index])
+                        for index in indexes]
+
+            rows = merge(*shard_data, key=sort_key, reverse=descending)
+
+        return RecordSet(headings=headings, data=list(islice(rows, limit)))
+
+    def invalidate_cache(self, con_name=None, tag=None):
+        """
+        Remove cached results by connection name, tag, or both.
+
+        If neither are given, every cached result is removed.
+        """
+        self.result_cache.invalidate(con_name=con_name, tag=tag)
+
+    def slow_queries(self, con_name=None, fingerprint=None):
+        """
+        Return the most recent slow queries, oldest first.
+
+        Only the slow queries of <con_name>, or with the <fingerprint> of
+        simqle.instrumentation.fingerprint, are returned if either is given.
+        Each is a SlowQuery, with its SQL, fingerprint, params_shape,
+        duration in seconds and explain plan if captured.
+        """
+        return self.slow_query_log.queries(con_name=con_name,
+                                           fingerprint=fingerprint)
+
+    def warm_up(self, connections=None, min_connections=1, parallel=True,
+                timeout=None):
+        """
+        Create the engines of connections and fill their pools in advance.
+
+        Each of <connections>, a list of connection names, or every
+        connection of the current mode if it isn't given, creates its engine
+        and opens <min_connections> pooled connections, so the first queries
+        don't wait for them. The connections are warmed up at the same time
+        if <parallel> is True, each within <timeout> seconds.
+
+        Return a dict of connection name to a dict of its engine_time and
+        connect_time in seconds, the number of connections opened, and the
+        error raised if it failed, which is not raised itself.
+        """
+        con_names = list(connections or self._connection_configs)
+        for con_name in con_names:
+            if con_name not in self._connection_configs:
+                raise UnknownConnectionError(
+                    "Unknown connection {}".format(con_name))
+
+        # the connections are created in the calls, so an invalid config is
+        # reported like any other error.
+        calls = [partial(self._warm_up, con_name, min_connections)
+                 for con_name in con_names]
+
+        outcomes = run_concurrently(
+            calls, max_workers=len(calls) if parallel else 1, timeout=timeout)
+
+        timings = {}
+        for con_name, (timing, exception) in zip(con_names, outcomes):
+            if exception is not None:
+                log.warning("The connection %s couldn't be warmed up: %s",
+                            con_name, exception)
+                timing = {"engine_time": None, "connect_time": None,
+                          "connections": 0}
+
+            timings[con_name] = dict(timing, error=exception)
+
+        return timings
+
+    def recordset_parallel(self, sql, con_name=None, partition_by=None,
+                           partitions=None, boundaries=None, params=None,
+                           as_table=False, max_workers=None, timeout=None,
+                           batch_size=DEFAULT_BATCH_SIZE, process_pool=None,
+                           schema=None):
+        """
+        Return the RecordSet of a query split into partitions run in processes.
+
+        The query is split on its <partition_by> column, either into
+        <partitions> by the modulo of the column, which must be an integer,
+        or into the ranges between the <boundaries>. See
+        simqle.processes.partition_queries. Each partition is run in a
+        process of <process_pool>, or of a pool of <max_workers> processes
+        created for the query, which builds a pyarrow Table from batches of
+        <batch_size> rows, with <schema> if given, and sends it back in the
+        Arrow IPC format rather than as pickled rows.
+
+        The tables are concatenated and returned as an ArrowRecordSet, which
+        only converts the values to Python objects as they are used, or as
+        the pyarrow Table itself if <as_table> is True.
+
+        The <sql> is wrapped as a subquery, so it mustn't end with an ORDER
+        BY on databases that don't allow one in a subquery, and the rows are
+        returned in the order of the partitions. If any partition fails a
+        ConcurrentQueryError is raised. Requires pyarrow.
+        """
+        con_name = self._con_name(con_name)
+        queries = [(partition_sql, con_name, dict(params or {},
+                                                  **partition_params))
+                   for partition_sql, partition_params in partition_queries(
+                       sql, partition_by, partitions=partitions,
+                       boundaries=boundaries)]
+
+        start_time = perf_counter()
+        owned_pool = process_pool is None
+        if owned_pool:
+            process_pool = self.process_pool(
+                max_workers=max_workers or min(len(queries),
+                                               os.cpu_count() or 1))
+
+        try:
+            arrow_table = arrow.concat_tables(process_pool.arrow_table_many(
+                queries, timeout=timeout, batch_size=batch_size,
+                schema=schema))
+        finally:
+            if owned_pool:
+                process_pool.shutdown(wait=False)
+
+        self.query_logger.log("Parallel query", con_name, sql, params,
+                              perf_counter() - start_time)
+
+        if as_table:
+            return arrow_table
+
+        return ArrowRecordSet(arrow_table)
+
+    def process_pool(self, max_workers=None, mp_context=None):
+        """
+        Return a QueryProcessPool that runs queries in <max_workers> processes.
+
+        Only the connections file name, or the config dict, is sent to the
+        processes, each of which builds a ConnectionManager of its own.
+        """
+        return QueryProcessPool(self.config_file or self.config,
+                                max_workers=max_workers,
+                                mp_context=mp_context)
+
+    def check_replicas(self, con_name=None):
+        """
+        Run a health check on the read replicas of connections.
+
+        Each replica of <con_name>, or of every connection if it isn't given,
+        runs SELECT 1. Replicas that fail are ejected, and ejected replicas
+        that succeed are used again. Return a dict of connection name to a
+        dict of replica name to its latency, or None if it failed.
+        """
+        con_names = [con_name] if con_name else list(self._replica_names)
+
+        return {name: self._replica_set(name).check()
+                for name in con_names if name in self._replica_names}
+
+    def stream_recordset(self, sql, con_name=None, params=None,
+                         batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Return a StreamingRecordSet that fetches rows lazily in batches.
+
+        A server side cursor is used where the database supports it, so at
+        most <batch_size> rows are held in memory at a time. The connection
+        is closed once the rows are exhausted, or when the with block is
+        exited:
+
+            with cm.stream_recordset(sql, con_name) as rst:
+                for row in rst:
+                    ...
+        """
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        headings, fetch_batch, close = self._read(
+            con_name, lambda connection: connection.stream(sql,
+                                                           params=params))
+
+        def close_stream():
+            close()
+            self.query_logger.log("Stream", con_name, sql, params,
+                                  perf_counter() - start_time)
+
+        return StreamingRecordSet(headings=headings, fetch_batch=fetch_batch,
+                                  close=close_stream, batch_size=batch_size)
+
+    def recordset_batches(self, sql, con_name=None, params=None,
+                          size=DEFAULT_BATCH_SIZE):
+        """
+        Iterate over RecordSets of at most <size> rows each.
+
+        Each batch is fetched from the cursor as it is required, so the
+        first batch can be processed while the database is still sending
+        the rest. The connection is closed once the batches are exhausted or
+        the iteration is abandoned.
+        """
+        with self.stream_recordset(sql, con_name, params=params,
+                                   batch_size=size) as stream:
+            for batch in stream.batches():
+                yield RecordSet(headings=stream.headings, data=batch)
+
+    def columnar_recordset(self, sql, con_name=None, params=None,
+                           batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Return a ColumnarRecordSet, which stores each column as an array.
+
+        The arrays are built from each batch of <batch_size> rows as it is
+        fetched, so only one batch of rows is held as Python objects at a
+        time. Requires numpy.
+        """
+        with self.stream_recordset(sql, con_name, params=params,
+                                   batch_size=batch_size) as stream:
+            return ColumnarRecordSet.from_batches(headings=stream.headings,
+                                                  batches=stream.batches())
+
+    def arrow_table(self, sql, con_name=None, params=None,
+                    batch_size=DEFAULT_BATCH_SIZE, schema=None):
+        """
+        Return the result of a query as a pyarrow Table.
+
+        The table is built from each batch of <batch_size> rows as it is
+        fetched, rather than from a RecordSet. The <schema> is inferred from
+        the first batch if not given. Requires pyarrow.
+        """
+        with self.stream_recordset(sql, con_name, params=params,
+                                   batch_size=batch_size) as stream:
+            return arrow.table(stream.headings, stream.batches(),
+                               schema=schema)
+
+    def arrow_reader(self, sql, con_name=None, params=None,
+                     batch_size=DEFAULT_BATCH_SIZE, schema=None):
+        """
+        Return a pyarrow RecordBatchReader streaming the result of a query.
+
+        Each record batch is fetched as the reader is read, and the
+        connection is closed once the reader is exhausted. Requires pyarrow.
+        """
+        stream = self.stream_recordset(sql, con_name, params=params,
+                                       batch_size=batch_size)
+
+        try:
+            return arrow.record_batch_reader(stream.headings,
+                                             stream.batches(), schema=schema)
+        except Exception:
+            stream.close()
+            raise
+
+    def bulk_load(self, table, rows, con_name=None, columns=None,
+                  method="auto", batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Load rows into a table using the fastest method of the database.
+
+        <rows> is any iterable, including a generator, of tuples in the order
+        of <columns>, or of dicts keyed by column. By default the method is
+        chosen by dialect: COPY on PostgreSQL, LOAD DATA LOCAL INFILE on
+        MySQL, fast_executemany on SQL Server, and batches of executemany in
+        a single transaction elsewhere. See simqle.bulk.bulk_load.
+
+        Return the number of rows loaded.
+        """
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+        row_count = connection.bulk_load(table, rows, columns=columns,
+                                         method=method,
+                                         batch_size=batch_size)
+        self.query_logger.log("Bulk load", con_name, table,
+                              {"method": method, "rows": row_count},
+                              perf_counter() - start_time)
+
+        return row_count
+
+    def dataframe(self, sql, con_name=None, params=None, chunksize=None,
+                  dtypes=None):
+        """
+        Return the result of a query as a pandas DataFrame.
+
+        The DataFrame is built from each batch of rows as it is fetched, with
+        the <dtypes> dict of column name to dtype, such as "category",
+        applied to each batch. If <chunksize> is given, an iterator of
+        DataFrames of at most <chunksize> rows is returned instead. Requires
+        pandas.
+        """
+        if chunksize:
+            return self._dataframe_chunks(sql, con_name, params=params,
+                                          chunksize=chunksize, dtypes=dtypes)
+
+        with self.stream_recordset(sql, con_name, params=params) as stream:
+            return frames.dataframe(stream.headings, stream.batches(),
+                                    dtypes=dtypes)
+
+    def execute_sql(self, sql, con_name=None, params=None):
+        """Execute SQL on a given connection."""
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+        connection.execute_sql(sql, params=params)
+        self.query_logger.log("Execution", con_name, sql, params,
+                              perf_counter() - start_time)
+
+    def execute_many(self, sql, con_name=None, params_list=(),
+                     batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Execute SQL on a given connection once for each dict of params.
+
+        The statement is compiled once, and the params are sent in batches of
+        <batch_size> using the driver's executemany, each batch in a single
+        transaction. <params_list> can be any iterable, including a
+        generator.
+
+        Return the number of dicts of params executed.
+        """
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+        row_count = connection.execute_many(sql, params_list=params_list,
+                                            batch_size=batch_size)
+        self.query_logger.log("Bulk execution", con_name, sql,
+                              {"batch_size": batch_size, "rows": row_count},
+                              perf_counter() - start_time)
+
+        return row_count
+
+    @contextmanager
+    def transaction(self, con_name=None):
+        """
+        Yield a Transaction that runs every statement in a single transaction.
+
+        The statements share one connection, and are committed together when
+        the with block is exited, or rolled back if an exception is raised.
+
+        with cm.transaction("my-sql") as tx:
+            tx.execute_sql("UPDATE ...")
+            tx.recordset("SELECT ...")
+        """
+        start_time = perf_counter()
+        con_name = self._con_name(con_name)
+        connection = self._get_connection(con_name)
+
+        try:
+            with connection.begin() as sa_connection:
+                yield Transaction(connection, sa_connection)
+
+        except Exception as exception:
+            log.info("Transaction on %s was rolled back after %.4f seconds",
+                     con_name, perf_counter() - start_time)
+            raise exception
+
+        log.info("Transaction on %s took %.4f seconds to commit", con_name,
+                 perf_counter() - start_time)
+
+    # --- Private Methods: ---
+
+    def _recordset(self, sql, con_name=None, params=None, cache_ttl=None,
+                   cache_tags=None):
+        """
+        Return headings and data from a connection.
+
+        The result is cached for <cache_ttl> seconds, or the cache_ttl of
+        the connection's config if not given, with any <cache_tags>. A
+        cache_ttl of 0 means the result isn't cached. The cache keeps its
+        own copy of the headings and rows, and each hit gets a copy of them,
+        so changing a returned RecordSet doesn't change later hits.
+        """
+        con_name = self._con_name(con_name)
+
+        if cache_ttl is None:
+            cache_ttl = self._connection_configs.get(con_name, {}).get(
+                "cache_ttl")
+
+        cache_key = None
+        if cache_ttl:
+            cache_key = self.result_cache.key(con_name, sql, params)
+
+        if cache_key is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                log.debug("Query on %s was returned from the cache",
+                          con_name)
+                headings, data = cached
+                return list(headings), list(data)
+
+        start_time = perf_counter()
+        rst = self._read(con_name, lambda connection: connection.recordset(
+            sql, params=params))
+        self.query_logger.log("Query", con_name, sql, params,
+                              perf_counter() - start_time)
+
+        if cache_key is not None:
+            headings, data = rst
+            self.result_cache.set(cache_key, (tuple(headings), tuple(data)),
+                                  cache_ttl, tags=cache_tags)
+
+        return rst
+
+    def _warm_up(self, con_name, min_connections):
+        """Warm up the connection of <con_name>."""
+        return self._get_connection(con_name).warm_up(
+            min_connections=min_connections)
+
+    def _read(self, con_name, read):
+        """
+        Return <read> called with the _Connection to read from.
+
+        A connection with replicas is read from one of them, chosen by its
+        replica strategy, and from the primary if every replica is ejected.
+        If a replica can't be reached it is ejected, and the read is retried
+        on the primary. Other errors, such as those in the SQL, are raised.
+        """
+        connection = self._get_connection(con_name)
+        replica_set = self._replica_set(con_name)
+
+        replica = replica_set.acquire() if replica_set is not None else None
+        if replica is None:
+            return read(connection)
+
+        start_time = perf_counter()
+
+        try:
+            result = read(replica.connection)
+
+        except (OperationalError, InterfaceError) as exception:
+            # drivers such as sqlite and pymysql raise OperationalErrors for
+            # mistakes in the SQL too, so unless the connection was lost the
+            # replica is checked before it is ejected.
+            if isinstance(exception, OperationalError) and (
+                    not exception.connection_invalidated) and (
+                    replica_set.check_replica(replica) is not None):
+                replica_set.release(replica)
+                raise exception
+
+            replica_set.release(replica, failed=True)
+            log.warning("Replica %s failed, reading from %s instead",
+                        replica.connection.name, con_name, exc_info=True)
+            return read(connection)
+
+        except Exception as exception:
+            replica_set.release(replica)
+            raise exception
+
+        replica_set.release(replica, elapsed_time=perf_counter() - start_time)
+        return result
+
+    def _dataframe_chunks(self, sql, con_name, params, chunksize, dtypes):
+        """Iterate over DataFrames of at most <chunksize> rows."""
+        with self.stream_recordset(sql, con_name, params=params,
+                                   batch_size=chunksize) as stream:
+            yield from frames.dataframes(stream.headings, stream.batches(),
+                                         dtypes=dtypes)
+
+    def _new_connection(self, conn_config):
+        """
+        Return a new _Connection sharing this manager's statement cache and
+        instrumentation.
+        """
+        return _Connection(conn_config, statement_cache=self.statement_cache,
+                           instrumentation=self.instrumentation)
+
+
+# A :limit param in SQL, which isn't part of a :: cast.
+_LIMIT_PARAM = re.compile(r"(?<!:):limit\b")
+
+
+class Transaction:
+    """
+    Statements on a single connection inside a transaction.
+
+    This is the object yielded by ConnectionManager.transaction, and should
+    only be used inside that with block.
+    """
+
+    def __init__(self, connection, sa_connection):
+        """Initialise with a _Connection and its open sqlalchemy connection."""
+        self._connection = connection
+        self._sa_connection = sa_connection
+
+    def execute_sql(self, sql, params=None):
+        """Execute SQL in this transaction."""
+        with self._connection.instrument("execute", sql,
+                                         params=params) as event:
+            self._connection.execute_on(self._sa_connection, sql,
+                                        params=params, event=event)
+
+    def execute_many(self, sql, params_list=()):
+        """Execute SQL in this transaction once for each dict of params."""
+        with self._connection.instrument("execute_many", sql) as event:
+            self._connection.execute_many_on(self._sa_connection, sql,
+                                             list(params_list), event=event)
+
+    def recordset(self, sql, params=None):
+        """Return a RecordSet from a query in this transaction."""
+        headings, data = self._recordset(sql, params=params)
+        return RecordSet(headings=headings, data=data)
+
+    def record_scalar(self, sql, params=None):
+        """Return a RecordScalar from a query in this transaction."""
+        headings, data = self._recordset(sql, params=params)
+        return RecordScalar(headings=headings, data=data)
+
+    def record(self, sql, params=None):
+        """Return a Record from a query in this transaction."""
+        headings, data = self._recordset(sql, params=params)
+        return Record(headings=headings, data=data)
+
+    def _recordset(self, sql, params=None):
+        """Return headings and data from a query in this transaction."""
+        with self._connection.instrument("recordset", sql,
+                                         params=params) as event:
+            return self._connection.recordset_on(self._sa_connection, sql,
+                                                 params=params, event=event)
+
 
 class _Connection:
     """
@@ -250,11 +1026,21 @@ class _Connection:
     is marked as internal only.
     """
 
-    def __init__(self, conn_config):
+    def __init__(self, conn_config, statement_cache=None,
+                 instrumentation=None):
         """Create a new Connection from a config dict."""
+        if statement_cache is None:
+            statement_cache = StatementCache()
+        self.statement_cache = statement_cache
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation
         self.driver = conn_config['driver']
         self._engine = None
+        self._engine_lock = Lock()
+        self._pid = None
         self.name = conn_config['name']
+        self.engine_options = {}
 
         # Edit the connection based on configuration options.
 
@@ -268,38 +1054,166 @@ class _Connection:
         else:
             self.connection_string = conn_config['connection']
 
-        # self.id = uuid.uuid4
-        # log.info(f"Connection created for {conn_config['name']} with id "
-        #          f"{self.id}")
+        # Drivers such as pyodbc and psycopg2 have faster executemany
+        # implementations that have to be switched on when the engine is
+        # created.
+        if conn_config.get('fast_executemany'):
+            dialect_driver = self.driver.split("://")[0]
+            self.engine_options.update(
+                FAST_EXECUTEMANY_OPTIONS.get(dialect_driver, {}))
+
+        # The connection pool can be tuned with a pool block, and any other
+        # create_engine argument, such as connect_args, can be set in an
+        # engine_options block, which takes precedence.
+        self.engine_options.update(
+            self._pool_options(conn_config.get('pool') or {}))
+        self.engine_options.update(conn_config.get('engine_options') or {})
+
+    @staticmethod
+    def _pool_options(pool_config):
+        """Return the create_engine arguments set by a pool block."""
+        pool_options = {}
+
+        for option, value in pool_config.items():
+            if option not in POOL_OPTIONS:
+                raise UnknownPoolOptionError(
+                    "{} is an unknown pool option".format(option))
+
+            if option == "class":
+                if value not in POOL_CLASSES:
+                    raise UnknownPoolOptionError(
+                        "{} is an unknown pool class".format(value))
+
+                value = getattr(pool, value)
+
+            pool_options[POOL_OPTIONS[option]] = value
+
+        return pool_options
 
     def _connect(self):
         """Create an engine based on sqlalchemy's create_engine."""
-        self._engine = create_engine(self.driver + self.connection_string)
+        self._engine = create_engine(self.driver + self.connection_string,
+                                     **self.engine_options)
+
+    @property
+    def _sync_engine(self):
+        """Return the engine that owns the connection pool."""
+        return self._engine
+
+    def _dispose_inherited_pool(self):
+        """
+        Replace a connection pool inherited from the parent process.
+
+        The inherited connections share their sockets with the parent, so
+        they are dropped without being closed, and the new pool opens new
+        connections as they are needed.
+        """
+        engine = self._sync_engine
+        try:
+            engine.dispose(close=False)
+        except TypeError:
+            # sqlalchemy before 1.4.33 always closes the connections, so the
+            # pool is recreated instead.
+            engine.pool = engine.pool.recreate()
+
+        log.info("The connection pool of %s was inherited by process %s "
+                 "and has been replaced", self.name, os.getpid())
+        self._pid = os.getpid()
 
     @property
     def engine(self):
-        """Load the engine if it hasn't been loaded before."""
-        if not self._engine:
-            self._connect()
+        """
+        Load the engine if it hasn't been loaded before.
+
+        If the process has forked since the engine was created, its pool is
+        replaced first, so processes never share connections.
+        """
+        if not self._engine or self._pid != os.getpid():
+            # only one thread creates the engine, and its connection pool.
+            with self._engine_lock:
+                if not self._engine:
+                    self._connect()
+                    self._pid = os.getpid()
+                elif self._pid != os.getpid():
+                    self._dispose_inherited_pool()
 
         return self._engine
 
-    def execute_sql(self, sql, params=None):
-        """Execute :sql: on this connection with named :params:."""
-        # action_id = uuid.uuid4
-        #
-        # log.info("")
+    def warm_up(self, min_connections=1):
+        """
+        Create the engine and open <min_connections> pooled connections.
+
+        The connections are opened at the same time, so each is a new
+        connection, then returned to the pool. A QueuePool keeps at most its
+        size of them.
+
+        Return a dict of the engine_time and connect_time in seconds, and
+        the number of connections opened.
+        """
+        start_time = perf_counter()
+        engine = self.engine
+        engine_time = perf_counter() - start_time
+
+        if isinstance(engine.pool, pool.QueuePool):
+            min_connections = min(min_connections, engine.pool.size())
+
+        connections = []
+        try:
+            for _ in range(min_connections):
+                connections.append(engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+
+        return {"engine_time": engine_time,
+                "connect_time": perf_counter() - start_time - engine_time,
+                "connections": len(connections)}
+
+    @contextmanager
+    def instrument(self, operation, sql, params=None):
+        """
+        Yield a QueryEvent for <sql> to fill in with measurements.
+
+        The event is passed to the instrumentation hooks when the block is
+        exited, with any exception raised. None is yielded if there are no
+        hooks, in which case nothing is measured.
+        """
+        event = self.instrumentation.start(self.name, sql, operation,
+                                           params=params)
+
+        if event is None:
+            yield None
+            return
+
+        try:
+            yield event
+
+        except Exception as exception:
+            event.error = exception
+            raise exception
+
+        finally:
+            self.instrumentation.emit(event)
 
-        bound_sql = bind_sql(sql, params)
+    @contextmanager
+    def begin(self, event=None):
+        """
+        Yield an open sqlalchemy connection inside a transaction.
 
+        The transaction is committed when the block is exited, or rolled back
+        on error, and the connection is closed either way.
+        """
         # TODO: discuss whether a connection should be closed on each
         # transaction.
+        start_time = perf_counter()
         connection = self.engine.connect()
         transaction = connection.begin()
 
-        # execute the query, and rollback on error
+        if event is not None:
+            event.checkout_time = perf_counter() - start_time
+
         try:
-            connection.execute(bound_sql)
+            yield connection
             transaction.commit()
 
         except Exception as exception:
@@ -309,27 +1223,202 @@ class _Connection:
         finally:
             connection.close()
 
+    def execute_sql(self, sql, params=None):
+        """Execute :sql: on this connection with named :params:."""
+        with self.instrument("execute", sql, params=params) as event:
+            with self.begin(event) as connection:
+                self.execute_on(connection, sql, params=params, event=event)
+
+    def execute_on(self, connection, sql, params=None, event=None):
+        """Execute <sql> with named <params> on an open connection."""
+        prepared_sql = self.statement_cache.prepare(sql, params)
+
+        start_time = perf_counter()
+        result = connection.execute(prepared_sql, params or {})
+
+        if event is not None:
+            event.execute_time = perf_counter() - start_time
+            # rowcount is -1 when the driver doesn't report it.
+            if result.rowcount >= 0:
+                event.row_count = result.rowcount
+
+    def execute_many(self, sql, params_list, batch_size):
+        """
+        Execute <sql> on this connection for each dict in <params_list>.
+
+        Each batch of <batch_size> params is executed with executemany in its
+        own transaction, so the batches before an error remain committed.
+
+        Return the number of params executed.
+        """
+        row_count = 0
+
+        with self.instrument("execute_many", sql) as event:
+            start_time = perf_counter()
+            connection = self.engine.connect()
+
+            if event is not None:
+                event.checkout_time = perf_counter() - start_time
+
+            try:
+                for batch in iter_batches(params_list, batch_size):
+                    transaction = connection.begin()
+
+                    # execute the batch, and rollback on error
+                    try:
+                        self.execute_many_on(connection, sql, batch,
+                                             event=event)
+                        transaction.commit()
+
+                    except Exception as exception:
+                        transaction.rollback()
+                        raise exception
+
+                    row_count += len(batch)
+
+            finally:
+                connection.close()
+
+        return row_count
+
+    def execute_many_on(self, connection, sql, params_list, event=None):
+        """
+        Execute <sql> with executemany on an open connection.
+
+        The statement is prepared with its types taken from the first dict of
+        <params_list>, which must be a list.
+        """
+        if not params_list:
+            return
+
+        prepared_sql = self.statement_cache.prepare(sql, params_list[0])
+
+        start_time = perf_counter()
+        connection.execute(prepared_sql, params_list)
+
+        if event is not None:
+            event.execute_time += perf_counter() - start_time
+            event.row_count = (event.row_count or 0) + len(params_list)
+
+    def bulk_load(self, table, rows, columns, method, batch_size):
+        """Load <rows> into <table>, see simqle.bulk.bulk_load."""
+        with self.instrument("bulk_load", "BULK LOAD " + table) as event:
+            start_time = perf_counter()
+            connection = self.engine.connect()
+
+            if event is not None:
+                event.checkout_time = perf_counter() - start_time
+
+            try:
+                start_time = perf_counter()
+                row_count = bulk.bulk_load(connection, table, rows,
+                                           columns=columns, method=method,
+                                           batch_size=batch_size)
+            finally:
+                connection.close()
+
+            if event is not None:
+                event.execute_time = perf_counter() - start_time
+                event.row_count = row_count
+
+        return row_count
+
     def recordset(self, sql, params=None):
         """
         Execute <sql> on <con>, with named <params>.
 
         Return (headings, data)
         """
-        # bind the named parameters.
-        bound_sql = bind_sql(sql, params)
+        with self.instrument("recordset", sql, params=params) as event:
+            with self.begin(event) as connection:
+                return self.recordset_on(connection, sql, params=params,
+                                         event=event)
 
-        # start the connection.
-        connection = self.engine.connect()
-        transaction = connection.begin()
+    def recordset_on(self, connection, sql, params=None, event=None):
+        """
+        Execute <sql> with named <params> on an open connection.
+
+        Return (headings, data)
+        """
+        # prepare the query, the named parameters are bound on execution.
+        prepared_sql = self.statement_cache.prepare(sql, params)
 
         # get the results from the query.
-        result = connection.execute(bound_sql)
+        start_time = perf_counter()
+        result = connection.execute(prepared_sql, params or {})
+        execute_time = perf_counter()
         data = result.fetchall()
         headings = list(result.keys())
 
-        # commit and close the connection
-        transaction.commit()
-        connection.close()
+        if event is not None:
+            event.execute_time = execute_time - start_time
+            event.fetch_time = perf_counter() - execute_time
+            event.row_count = len(data)
+            if self.instrumentation.measure_bytes:
+                event.byte_count = result_size((headings, data))
 
         return headings, data
-        # return RecordSet(headings=headings, data=data)
+
+    def stream(self, sql, params=None):
+        """
+        Execute <sql> with named <params> using a server side cursor.
+
+        The connection is left open so rows can be fetched lazily.
+
+        Return (headings, fetch_batch, close), where fetch_batch(size)
+        returns the next list of at most size rows and close commits and
+        closes the connection.
+        """
+        # prepare the query, and ask for a server side cursor where the
+        # dialect supports one.
+        prepared_sql = self.statement_cache.prepare(
+            sql, params).execution_options(stream_results=True)
+
+        event = self.instrumentation.start(self.name, sql, "stream",
+                                           params=params)
+
+        # start the connection.
+        start_time = perf_counter()
+        connection = self.engine.connect()
+        transaction = connection.begin()
+        execute_time = perf_counter()
+
+        try:
+            result = connection.execute(prepared_sql, params or {})
+        except Exception as exception:
+            transaction.rollback()
+            connection.close()
+            if event is not None:
+                event.checkout_time = execute_time - start_time
+                event.execute_time = perf_counter() - execute_time
+                event.error = exception
+                self.instrumentation.emit(event)
+            raise exception
+
+        headings = list(result.keys())
+
+        if event is None:
+            fetch_batch = result.fetchmany
+
+        else:
+            event.checkout_time = execute_time - start_time
+            event.execute_time = perf_counter() - execute_time
+            event.row_count = 0
+
+            def fetch_batch(size):
+                start_time = perf_counter()
+                batch = result.fetchmany(size)
+                event.fetch_time += perf_counter() - start_time
+                event.row_count += len(batch)
+                return batch
+
+        def close():
+            try:
+                result.close()
+                transaction.commit()
+            finally:
+                connection.close()
+                if event is not None:
+                    self.instrumentation.emit(event)
+
+        return headings, fetch_batch, close
@@ -13,3 +13,77 @@ DEFAULT_FILE_LOCATIONS = [
     # the home folder on either Linux or Windows
     join(expanduser("~"), ".connections.yaml")
 ]
+
+# The number of rows fetched from the cursor at a time when results are
+# streamed rather than fetched all at once.
+DEFAULT_BATCH_SIZE = 1000
+
+# create_engine options that switch on the fastest executemany implementation
+# of a driver, used when a connection has the fast_executemany option set.
+FAST_EXECUTEMANY_OPTIONS = {
+    "mssql+pyodbc": {"fast_executemany": True},
+    "postgresql+psycopg2": {"executemany_mode": "values"},
+}
+
+# The number of prepared queries kept by each statement cache.
+DEFAULT_STATEMENT_CACHE_SIZE = 128
+
+# The options allowed in the pool block of a connection, mapped to the
+# create_engine argument they set.
+POOL_OPTIONS = {
+    "class": "poolclass",
+    "size": "pool_size",
+    "max_overflow": "max_overflow",
+    "timeout": "pool_timeout",
+    "recycle": "pool_recycle",
+    "pre_ping": "pool_pre_ping",
+}
+
+# The sqlalchemy pool classes that can be chosen with the pool class option.
+POOL_CLASSES = [
+    "QueuePool",
+    "NullPool",
+    "StaticPool",
+    "SingletonThreadPool",
+    "AssertionPool",
+]
+
+# The number of query results kept by a ConnectionManager's result cache.
+DEFAULT_RESULT_CACHE_ENTRIES = 1024
+
+# The upper bounds in seconds of the buckets of query duration histograms.
+DEFAULT_HISTOGRAM_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# The number of characters of SQL written to each log record of a query.
+DEFAULT_MAX_LOGGED_SQL_LENGTH = 1000
+
+# The number of slow queries kept by a ConnectionManager's slow query log.
+DEFAULT_SLOW_QUERY_ENTRIES = 100
+
+# The statement prefixed to a slow query to capture its plan, by dialect.
+# SQL Server's plans can only be captured with SET SHOWPLAN, which has to be
+# the only statement in its batch, so they aren't captured.
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+}
+
+# The most threads used to run queries concurrently, unless more are asked
+# for. Each thread checks out its own connection from the pool.
+DEFAULT_MAX_WORKERS = 8
+
+# The strategies for choosing the read replica of a connection to read from.
+REPLICA_STRATEGIES = ["round_robin", "least_outstanding", "latency_weighted"]
+
+# The seconds a failed read replica is ejected for before it is retried.
+DEFAULT_REPLICA_RETRY_INTERVAL = 30
+
+# The weight of each new read in the moving average latency of a replica.
+REPLICA_LATENCY_DECAY = 0.2
+
+# The types a named query can return, by the ConnectionManager method used.
+QUERY_RETURN_TYPES = ["recordset", "record", "record_scalar", "execute"]
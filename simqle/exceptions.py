@@ -35,3 +35,65 @@ class UnknownSimqleMode(Exception):
     def __init__(self, msg):
         super().__init__(msg)
         self.message = msg
+
+
+class UnknownPoolOptionError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class BulkLoadError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class QueryTimeoutError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class ConcurrentQueryError(Exception):
+    def __init__(self, msg, errors=None, results=None):
+        super().__init__(msg)
+        self.message = msg
+        self.errors = errors or {}
+        self.results = results or []
+
+
+class UnknownReplicaStrategyError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class QueryConfigError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class UnknownQueryError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class QueryParamsError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class PartitionError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
+
+
+class EmptyShardGroupError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.message = msg
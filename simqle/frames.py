@@ -0,0 +1,61 @@
+"""Build pandas DataFrames from query results."""
+
+
+def dataframes(headings, batches, dtypes=None):
+    """
+    Iterate over pandas DataFrames built from lists of rows.
+
+    Each list of rows in <batches> becomes one DataFrame, with the <dtypes>
+    dict of column name to dtype applied as it is built.
+    """
+    pd = _import_pandas()
+
+    for batch in batches:
+        frame = pd.DataFrame.from_records(batch, columns=headings)
+
+        if dtypes:
+            frame = frame.astype(dtypes)
+
+        yield frame
+
+
+def dataframe(headings, batches, dtypes=None):
+    """
+    Return a single pandas DataFrame built batch by batch from lists of rows.
+
+    Only one batch of rows is held as Python objects at a time, and the
+    <dtypes> are applied to each batch before the batches are concatenated.
+    """
+    pd = _import_pandas()
+
+    frames = list(dataframes(headings, batches, dtypes=dtypes))
+
+    if not frames:
+        frame = pd.DataFrame(columns=headings)
+        return frame.astype(dtypes) if dtypes else frame
+
+    if len(frames) == 1:
+        return frames[0]
+
+    frame = pd.concat(frames, ignore_index=True)
+
+    # categorical columns are concatenated as objects when each batch has
+    # different categories, so their categories are combined instead.
+    for column, dtype in (dtypes or {}).items():
+        if isinstance(dtype, str) and dtype == "category" and (
+                frame[column].dtype != "category"):
+            frame[column] = pd.api.types.union_categoricals(
+                [frame_[column] for frame_ in frames])
+
+    return frame
+
+
+def _import_pandas():
+    """Import pandas, which is only required for DataFrame results."""
+    try:
+        import pandas
+    except ImportError as e:
+        raise ImportError("pandas is required for DataFrame results, install "
+                          "it with pip install pandas") from e
+
+    return pandas
@@ -1,5 +1,14 @@
+from collections import OrderedDict
+from concurrent import futures
+from itertools import islice
+from threading import Lock
+from time import monotonic
+
 from sqlalchemy import text, VARCHAR, bindparam
 
+from simqle.constants import DEFAULT_STATEMENT_CACHE_SIZE, DEFAULT_MAX_WORKERS
+from simqle.exceptions import QueryTimeoutError
+
 
 def bind_sql(sql, params):
     """
@@ -13,14 +22,169 @@ def bind_sql(sql, params):
         sql: The SQL query to bind parameters to
         params: The named parameters to bind to the query
     """
-    bound_sql = text(sql)  # convert to the useful sqlalchemy text
+    # the query is only parsed the first time it is seen with these params.
+    bound_sql = _BIND_SQL_CACHE.prepare(sql, params)
 
     if params:
-        for key, value in params.items():
-            # If the type of the value of the parameter is str, then we use
-            # the VARCHAR object with no maximum, else use the default Type
-            type_ = VARCHAR(None) if isinstance(value, str) else None
-            param = bindparam(key=key, value=value, type_=type_)
-            bound_sql = bound_sql.bindparams(param)
+        bound_sql = bound_sql.params(params)
 
     return bound_sql
+
+
+def prepare_sql(sql, params):
+    """
+    Return a SQL query with typed, but unbound, named parameters.
+
+    The values are passed when the query is executed instead, so the same
+    query can be executed with many sets of parameters. The types are taken
+    from the values in <params>.
+
+    Args:
+        sql: The SQL query to prepare
+        params: An example of the named parameters that will be passed
+    """
+    prepared_sql = text(sql)
+
+    if params:
+        prepared_sql = prepared_sql.bindparams(*[
+            bindparam(key=key, type_=_param_type(value))
+            for key, value in params.items()
+        ])
+
+    return prepared_sql
+
+
+def iter_batches(iterable, size):
+    """Iterate over lists of at most <size> items from <iterable>."""
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def run_concurrently(calls, max_workers=None, timeout=None, executor=None):
+    """
+    Call each function of <calls> on a pool of <max_workers> threads.
+
+    Return a list of (result, exception) pairs in the order of <calls>, one
+    of which is None. A call that doesn't return within <timeout> seconds of
+    this function being called has a QueryTimeoutError. Running calls can't
+    be interrupted, so they are left to finish in the background.
+
+    If an <executor> is given the calls are submitted to it instead, and it
+    isn't shut down.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+
+    shutdown = executor is None
+    if shutdown:
+        executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers or min(len(calls), DEFAULT_MAX_WORKERS))
+    deadline = None if timeout is None else monotonic() + timeout
+    outcomes = []
+
+    try:
+        pending = [executor.submit(call) for call in calls]
+
+        for future in pending:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - monotonic(), 0)
+
+            try:
+                outcomes.append((future.result(timeout=remaining), None))
+
+            except futures.TimeoutError:
+                future.cancel()
+                outcomes.append((None, QueryTimeoutError(
+                    "The query didn't complete within {} seconds".format(
+                        timeout))))
+
+            except Exception as exception:
+                outcomes.append((None, exception))
+
+    finally:
+        # don't wait for calls that timed out.
+        if shutdown:
+            executor.shutdown(wait=False)
+
+    return outcomes
+
+
+def _param_type(value):
+    """
+    Return the sqlalchemy type to bind a parameter value with.
+
+    If the type of the value of the parameter is str, then we use the VARCHAR
+    object with no maximum, else use the default Type.
+    """
+    return VARCHAR(None) if isinstance(value, str) else None
+
+
+class StatementCache:
+    """
+    A least recently used cache of prepared SQL queries.
+
+    Queries are keyed on their SQL text and the names and types of their
+    parameters, so a query that is executed many times is only parsed into a
+    sqlalchemy text clause once. The parameter values are passed when the
+    query is executed instead.
+
+    The hits and misses attributes count how often a prepared query was
+    found in the cache.
+    """
+
+    def __init__(self, maxsize=DEFAULT_STATEMENT_CACHE_SIZE):
+        """Initialise an empty cache holding at most <maxsize> queries."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._statements = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._statements)
+
+    def prepare(self, sql, params=None):
+        """Return the prepared query for <sql> and the types of <params>."""
+        if params:
+            key = (sql, tuple((k, isinstance(v, str))
+                              for k, v in params.items()))
+        else:
+            key = (sql, ())
+
+        with self._lock:
+            prepared_sql = self._statements.get(key)
+
+            if prepared_sql is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return prepared_sql
+
+            self.misses += 1
+
+        prepared_sql = prepare_sql(sql, params)
+
+        if self.maxsize:
+            with self._lock:
+                self._statements[key] = prepared_sql
+
+                if len(self._statements) > self.maxsize:
+                    self._statements.popitem(last=False)
+
+        return prepared_sql
+
+    def clear(self):
+        """Remove all prepared queries and reset the counters."""
+        with self._lock:
+            self._statements.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_BIND_SQL_CACHE = StatementCache()
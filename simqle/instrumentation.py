@@ -0,0 +1,305 @@
+"""Record the timings, row counts and errors of each query."""
+
+import re
+
+from bisect import bisect_left
+from functools import lru_cache
+from threading import Lock
+from time import perf_counter
+
+from simqle.constants import DEFAULT_HISTOGRAM_BUCKETS
+from simqle.logging import logger as log
+
+# The phases of a query that are timed separately.
+PHASES = ("checkout", "execute", "fetch", "total")
+
+# The operations whose rows are fetched as the caller reads them.
+STREAMED_OPERATIONS = ("stream", )
+
+
+class QueryEvent:
+    """
+    The measurements of a single query, passed to each instrumentation hook.
+
+    params are the named params of the query, or None for statements
+    executed with many sets of params.
+
+    The times are in seconds. checkout_time is the time taken to get a
+    connection from the pool, execute_time the time taken to execute the
+    statement, and fetch_time the time taken to fetch its rows. Statements
+    run inside a transaction have no checkout_time of their own. total_time
+    is the time taken by the whole query, except for streamed queries, where
+    it is the sum of the other times, as the rows are fetched as the caller
+    reads them and the time the caller spends between fetches isn't the
+    query's.
+
+    row_count is the number of rows returned, or affected by a statement
+    where the driver reports it, otherwise None. byte_count is the estimated
+    size of the rows returned, only measured if the Instrumentation was
+    created with measure_bytes. error is the exception raised by the query,
+    if any.
+    """
+
+    __slots__ = ("con_name", "sql", "params", "operation", "start_time",
+                 "checkout_time", "execute_time", "fetch_time", "total_time",
+                 "row_count", "byte_count", "error")
+
+    def __init__(self, con_name, sql, operation, params=None):
+        """Initialise an event for <sql> on <con_name>."""
+        self.con_name = con_name
+        self.sql = sql
+        self.params = params
+        self.operation = operation
+        self.start_time = perf_counter()
+        self.checkout_time = 0.0
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.total_time = 0.0
+        self.row_count = None
+        self.byte_count = None
+        self.error = None
+
+    @property
+    def fingerprint(self):
+        """The normalised SQL, see simqle.instrumentation.fingerprint."""
+        return fingerprint(self.sql)
+
+
+class Instrumentation:
+    """
+    A registry of hooks called with a QueryEvent after each query.
+
+    A hook is any callable taking a QueryEvent, such as a MetricsAggregator.
+    Queries aren't timed at all while there are no hooks.
+
+    An exception raised by a hook is logged, and never interrupts the query.
+    """
+
+    def __init__(self, measure_bytes=False):
+        """Initialise a registry without any hooks."""
+        self.measure_bytes = measure_bytes
+        self.hooks = ()
+        self._lock = Lock()
+
+    def __bool__(self):
+        return bool(self.hooks)
+
+    def add_hook(self, hook):
+        """Call <hook> with the QueryEvent of each query."""
+        with self._lock:
+            self.hooks = self.hooks + (hook, )
+
+    def remove_hook(self, hook):
+        """Stop calling <hook>."""
+        with self._lock:
+            self.hooks = tuple(hook_ for hook_ in self.hooks
+                               if hook_ is not hook)
+
+    def start(self, con_name, sql, operation, params=None):
+        """Return a new QueryEvent, or None if there are no hooks."""
+        if not self.hooks:
+            return None
+
+        return QueryEvent(con_name, sql, operation, params=params)
+
+    def emit(self, event):
+        """Set the total time of <event>, and call each hook with it."""
+        if event.operation in STREAMED_OPERATIONS:
+            event.total_time = (event.checkout_time + event.execute_time
+                                + event.fetch_time)
+        else:
+            event.total_time = perf_counter() - event.start_time
+
+        # the hooks are replaced rather than changed, so they can be read
+        # without the lock.
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception:
+                log.exception("Instrumentation hook %r failed", hook)
+
+
+class Histogram:
+    """
+    A cumulative histogram of observations, as used by Prometheus.
+
+    counts[i] is the number of observations less than or equal to
+    buckets[i], and count includes the observations above every bucket.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_HISTOGRAM_BUCKETS):
+        """Initialise an empty histogram with sorted upper <buckets>."""
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Add an observation."""
+        for index in range(bisect_left(self.buckets, value),
+                           len(self.buckets)):
+            self.counts[index] += 1
+
+        self.count += 1
+        self.sum += value
+
+
+class QueryStats:
+    """The histograms and counters of a connection or a query fingerprint."""
+
+    def __init__(self, buckets=DEFAULT_HISTOGRAM_BUCKETS):
+        """Initialise empty stats."""
+        self.histograms = {phase: Histogram(buckets) for phase in PHASES}
+        self.queries = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def observe(self, event):
+        """Add the measurements of a QueryEvent."""
+        self.histograms["checkout"].observe(event.checkout_time)
+        self.histograms["execute"].observe(event.execute_time)
+        self.histograms["fetch"].observe(event.fetch_time)
+        self.histograms["total"].observe(event.total_time)
+
+        self.queries += 1
+        if event.error is not None:
+            self.errors += 1
+        if event.row_count:
+            self.rows += event.row_count
+        if event.byte_count:
+            self.bytes += event.byte_count
+
+
+class MetricsAggregator:
+    """
+    An instrumentation hook that aggregates QueryEvents in memory.
+
+    Stats are kept for each connection, in self.connections, and for each
+    query fingerprint on each connection, in self.fingerprints. The number
+    of fingerprints is capped at <max_fingerprints>, after which new
+    fingerprints are counted together under the fingerprint "other".
+
+        aggregator = MetricsAggregator()
+        cm.instrumentation.add_hook(aggregator)
+    """
+
+    def __init__(self, buckets=DEFAULT_HISTOGRAM_BUCKETS,
+                 max_fingerprints=1000):
+        """Initialise an aggregator without any stats."""
+        self.buckets = tuple(buckets)
+        self.max_fingerprints = max_fingerprints
+        self.connections = {}
+        self.fingerprints = {}
+        self._lock = Lock()
+
+    def __call__(self, event):
+        """Add the measurements of a QueryEvent."""
+        fingerprint_key = (event.con_name, event.fingerprint)
+
+        with self._lock:
+            if fingerprint_key not in self.fingerprints and (
+                    len(self.fingerprints) >= self.max_fingerprints):
+                fingerprint_key = (event.con_name, "other")
+
+            for stats, key in ((self.connections, event.con_name),
+                               (self.fingerprints, fingerprint_key)):
+                if key not in stats:
+                    stats[key] = QueryStats(self.buckets)
+                stats[key].observe(event)
+
+    def reset(self):
+        """Remove all the stats."""
+        with self._lock:
+            self.connections.clear()
+            self.fingerprints.clear()
+
+
+def prometheus_text(aggregator, prefix="simqle"):
+    """
+    Return the stats of a MetricsAggregator in the Prometheus text format.
+
+    Serve the result from a /metrics endpoint for Prometheus to scrape.
+    """
+    lines = []
+
+    with aggregator._lock:
+        groups = (
+            ("query", aggregator.connections.items(),
+             lambda con_name: {"connection": con_name}),
+            ("fingerprint", aggregator.fingerprints.items(),
+             lambda key: {"connection": key[0], "fingerprint": key[1]}),
+        )
+
+        for group, items, key_labels in groups:
+            items = list(items)
+            name = "{}_{}".format(prefix, group)
+
+            lines.append("# TYPE {}_duration_seconds histogram".format(name))
+            for key, stats in items:
+                for phase, histogram in stats.histograms.items():
+                    labels = dict(key_labels(key), phase=phase)
+                    lines.extend(_histogram_lines(
+                        name + "_duration_seconds", labels, histogram))
+
+            for counter, attribute in (("queries", "queries"),
+                                       ("errors", "errors"),
+                                       ("rows", "rows"),
+                                       ("bytes", "bytes")):
+                lines.append("# TYPE {}_{}_total counter".format(name,
+                                                                 counter))
+                for key, stats in items:
+                    lines.append("{}_{}_total{} {}".format(
+                        name, counter, _labels(key_labels(key)),
+                        getattr(stats, attribute)))
+
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, labels, histogram):
+    """Return the bucket, sum and count lines of a histogram."""
+    for bucket, count in zip(histogram.buckets, histogram.counts):
+        yield "{}_bucket{} {}".format(
+            name, _labels(dict(labels, le=repr(float(bucket)))), count)
+
+    yield "{}_bucket{} {}".format(name, _labels(dict(labels, le="+Inf")),
+                                  histogram.count)
+    yield "{}_sum{} {!r}".format(name, _labels(labels), histogram.sum)
+    yield "{}_count{} {}".format(name, _labels(labels), histogram.count)
+
+
+def _labels(labels):
+    """Format a dict of labels, escaping their values."""
+    return "{" + ",".join(
+        '{}="{}"'.format(label, str(value).replace("\\", "\\\\")
+                         .replace('"', '\\"').replace("\n", "\\n"))
+        for label, value in labels.items()) + "}"
+
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"                            # strings
+    r"|(?<![\w:])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b"  # numbers
+    r"|(?<!:):\w+"                               # named params
+)
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """
+    Return <sql> normalised so that the same query has the same fingerprint.
+
+    Comments are removed, whitespace is collapsed, literals and named params
+    are replaced with ?, and lists of them, such as IN lists, with (?+).
+
+        fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND x = :x")
+        -> "SELECT * FROM t WHERE id IN (?+) AND x = ?"
+    """
+    sql = _COMMENTS.sub(" ", sql)
+    sql = _LITERALS.sub("?", sql)
+    sql = _LISTS.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
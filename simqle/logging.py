@@ -2,4 +2,97 @@
 
 import logging
 
+from itertools import count
+
+from simqle.constants import DEFAULT_MAX_LOGGED_SQL_LENGTH
+
 logger = logging.getLogger("simqle")
+
+
+class QueryLogger:
+    """
+    Logs the duration of each query to the simqle logger.
+
+    Nothing is formatted unless the logger is enabled for <level>, and then
+    only when the log record is emitted, so logging adds almost nothing to a
+    query while it is switched off.
+
+    The SQL is truncated to <max_sql_length> characters, and if
+    <redact_params> is True only the names and types of the params are
+    logged, never their values. If <sample_every> is N, only 1 in N queries
+    are logged.
+
+    Queries that take at least <slow_query_threshold> seconds are always
+    logged, as warnings, regardless of the sampling.
+    """
+
+    def __init__(self, level=logging.INFO,
+                 max_sql_length=DEFAULT_MAX_LOGGED_SQL_LENGTH,
+                 redact_params=True, sample_every=1,
+                 slow_query_threshold=None):
+        """Initialise a QueryLogger."""
+        self.level = level
+        self.max_sql_length = max_sql_length
+        self.redact_params = redact_params
+        self.sample_every = sample_every
+        self.slow_query_threshold = slow_query_threshold
+        self._counter = count()
+
+    def log(self, operation, con_name, sql, params, elapsed_time):
+        """Log that <operation> of <sql> on <con_name> took <elapsed_time>."""
+        if self.slow_query_threshold is not None and (
+                elapsed_time >= self.slow_query_threshold):
+            level = logging.WARNING
+            message = "Slow %s on %s took %.4f seconds, sql=%s, params=%s"
+
+        else:
+            if not logger.isEnabledFor(self.level):
+                return
+
+            # next on a count is atomic, so the sampling is thread safe.
+            if self.sample_every > 1 and (
+                    next(self._counter) % self.sample_every):
+                return
+
+            level = self.level
+            message = "%s on %s took %.4f seconds, sql=%s, params=%s"
+
+        logger.log(level, message, operation, con_name, elapsed_time,
+                   _LoggedSQL(sql, self.max_sql_length),
+                   _LoggedParams(params, self.redact_params))
+
+
+class _LoggedSQL:
+    """SQL that is only truncated when the log record is formatted."""
+
+    __slots__ = ("sql", "max_length")
+
+    def __init__(self, sql, max_length):
+        self.sql = sql
+        self.max_length = max_length
+
+    def __str__(self):
+        sql = " ".join(str(self.sql).split())
+
+        if self.max_length is not None and len(sql) > self.max_length:
+            return sql[:self.max_length] + "..."
+
+        return sql
+
+
+class _LoggedParams:
+    """Params that are only redacted when the log record is formatted."""
+
+    __slots__ = ("params", "redact")
+
+    def __init__(self, params, redact):
+        self.params = params
+        self.redact = redact
+
+    def __str__(self):
+        if not self.redact or not self.params:
+            return str(self.params)
+
+        return "{" + ", ".join(
+            "{}: {}".format(name, type(value).__name__)
+            for name, value in self.params.items()) + "}"
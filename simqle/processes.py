@@ -0,0 +1,207 @@
+"""Run queries on a pool of processes, each with its own ConnectionManager."""
+
+import multiprocessing
+
+from concurrent import futures
+from functools import partial
+
+from simqle import arrow
+from simqle.constants import DEFAULT_BATCH_SIZE
+from simqle.exceptions import ConcurrentQueryError, PartitionError
+from simqle.helper import run_concurrently
+
+# The ConnectionManager of a worker process, and the config it was built
+# from. Each worker builds its own the first time it runs a query.
+_worker_manager = None
+_worker_config = None
+
+
+class QueryProcessPool:
+    """
+    A pool of processes that run queries on the connections of a config.
+
+    Only the config, a connections file name or a config dict, is sent to
+    the worker processes, never engines or connections. Each worker builds a
+    ConnectionManager of its own from it, with the default options, the
+    first time it runs a query, and reuses it for later queries.
+
+    The arguments and results of each query are pickled between the
+    processes, so they must be picklable.
+    """
+
+    def __init__(self, config, max_workers=None, mp_context=None):
+        """
+        Initialise a pool of <max_workers> processes for <config>.
+
+        <mp_context> is a multiprocessing context, to choose how the
+        processes are started. By default they are spawned, as forking a
+        process with other threads running can deadlock the child.
+        """
+        if mp_context is None:
+            mp_context = multiprocessing.get_context("spawn")
+
+        self.config = config
+        self.executor = futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                    mp_context=mp_context)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, method, *args, **kwargs):
+        """
+        Call <method> of a worker's ConnectionManager, and return a Future.
+
+        For example submit("recordset", sql, con_name, params=params).
+        """
+        return self.executor.submit(_call_in_worker, self.config, method,
+                                    args, kwargs)
+
+    def recordset(self, sql, con_name=None, params=None):
+        """Return the RecordSet of a query run in a worker process."""
+        return self.submit("recordset", sql, con_name,
+                           params=params).result()
+
+    def execute_sql(self, sql, con_name=None, params=None):
+        """Execute SQL in a worker process."""
+        return self.submit("execute_sql", sql, con_name,
+                           params=params).result()
+
+    def recordset_many(self, queries, timeout=None, return_exceptions=False):
+        """
+        Return the RecordSets of independent queries run in the processes.
+
+        <queries> is a list of (sql, con_name, params) tuples, where con_name
+        and params can be left out, and the RecordSets are returned in the
+        order of <queries>. Errors and timeouts are handled as by
+        ConnectionManager.recordset_many.
+        """
+        calls = [partial(_call_in_worker, self.config, "recordset", query,
+                         {})
+                 for query in queries]
+
+        return self._run_many(calls, timeout, return_exceptions)
+
+    def arrow_table_many(self, queries, timeout=None, return_exceptions=False,
+                         batch_size=DEFAULT_BATCH_SIZE, schema=None):
+        """
+        Return the pyarrow Tables of independent queries run in the processes.
+
+        Like recordset_many, but each process builds a pyarrow Table from
+        batches of <batch_size> rows, with <schema> if given, and sends it
+        back in the Arrow IPC format rather than as pickled rows. Requires
+        pyarrow.
+        """
+        calls = [partial(_arrow_ipc_in_worker, self.config, query,
+                         batch_size, schema)
+                 for query in queries]
+
+        results = self._run_many(calls, timeout, return_exceptions)
+
+        return [result if isinstance(result, Exception)
+                else arrow.from_ipc(result) for result in results]
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes once their queries are complete."""
+        self.executor.shutdown(wait=wait)
+
+    def _run_many(self, calls, timeout, return_exceptions):
+        """Return the results of <calls> run in the processes."""
+        outcomes = run_concurrently(calls, timeout=timeout,
+                                    executor=self.executor)
+        results = [exception or result for result, exception in outcomes]
+
+        if return_exceptions:
+            return results
+
+        errors = {index: exception
+                  for index, (_, exception) in enumerate(outcomes)
+                  if exception is not None}
+
+        if errors:
+            index, error = next(iter(errors.items()))
+            raise ConcurrentQueryError(
+                "{} of {} queries failed, query {} with: {}".format(
+                    len(errors), len(outcomes), index, error),
+                errors=errors, results=results)
+
+        return results
+
+
+def partition_queries(sql, partition_by, partitions=None, boundaries=None):
+    """
+    Return a list of (sql, params) tuples, one for each partition of <sql>.
+
+    The query is wrapped as a subquery, filtered on its <partition_by>
+    column. If <partitions> is given, the rows are split by the modulo of
+    the column, which must be an integer. If <boundaries> are given instead,
+    the rows are split into the ranges below the first boundary, between
+    each pair of boundaries, and from the last boundary up. Rows where the
+    column is NULL are in the first partition.
+    """
+    if partition_by is None or (partitions is None) == (boundaries is None):
+        raise PartitionError("A partition_by column and either partitions "
+                             "or boundaries must be given")
+
+    subquery = "SELECT * FROM ({}) simqle_partition WHERE ".format(sql)
+    is_null = " OR {} IS NULL".format(partition_by)
+
+    if partitions is not None:
+        if partitions < 1:
+            raise PartitionError("There must be at least 1 partition")
+
+        # the modulo of a negative number is negative on most databases.
+        condition = "ABS({} % :simqle_partitions) = :simqle_partition".format(
+            partition_by)
+
+        return [(subquery + condition + (is_null if partition == 0 else ""),
+                 {"simqle_partitions": partitions,
+                  "simqle_partition": partition})
+                for partition in range(partitions)]
+
+    boundaries = sorted(boundaries)
+    if not boundaries:
+        raise PartitionError("There must be at least 1 boundary")
+
+    queries = [(subquery + "{} < :simqle_upper".format(partition_by)
+                + is_null, {"simqle_upper": boundaries[0]})]
+
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        queries.append((
+            subquery + "{0} >= :simqle_lower AND {0} < :simqle_upper".format(
+                partition_by),
+            {"simqle_lower": lower, "simqle_upper": upper}))
+
+    queries.append((subquery + "{} >= :simqle_lower".format(partition_by),
+                    {"simqle_lower": boundaries[-1]}))
+
+    return queries
+
+
+def _manager(config):
+    """Return the worker's ConnectionManager for <config>."""
+    global _worker_manager, _worker_config
+
+    if _worker_manager is None or _worker_config != config:
+        # imported here, as the connection_manager module imports this one.
+        from simqle.connection_manager import ConnectionManager
+
+        _worker_manager = ConnectionManager(config)
+        _worker_config = config
+
+    return _worker_manager
+
+
+def _call_in_worker(config, method, args, kwargs):
+    """Call <method> of the worker's ConnectionManager for <config>."""
+    return getattr(_manager(config), method)(*args, **kwargs)
+
+
+def _arrow_ipc_in_worker(config, query, batch_size, schema):
+    """Return the Arrow IPC stream of the result of <query> in a worker."""
+    arrow_table = _manager(config).arrow_table(*query, batch_size=batch_size,
+                                               schema=schema)
+
+    return arrow.to_ipc(arrow_table)
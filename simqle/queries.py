@@ -0,0 +1,120 @@
+"""Load the named queries of a connections file."""
+
+import os
+
+from sqlalchemy import text
+
+from simqle.constants import QUERY_RETURN_TYPES
+from simqle.exceptions import (
+    QueryConfigError, UnknownQueryError, QueryParamsError,
+)
+
+
+class Query:
+    """
+    A named query, with its SQL, connection and return type.
+
+    The SQL is parsed once when the query is loaded, to find the names of
+    its params.
+    """
+
+    __slots__ = ("name", "sql", "con_name", "returns", "param_names")
+
+    def __init__(self, name, sql, con_name=None, returns="recordset"):
+        """Initialise a query, raising a QueryConfigError if it is invalid."""
+        if returns not in QUERY_RETURN_TYPES:
+            raise QueryConfigError(
+                "Query {} has an unknown return type {}".format(name,
+                                                                returns))
+
+        self.name = name
+        self.sql = sql
+        self.con_name = con_name
+        self.returns = returns
+
+        try:
+            self.param_names = frozenset(text(sql).compile().params)
+        except Exception as e:
+            raise QueryConfigError(
+                "Query {} couldn't be parsed: {}".format(name, e)) from e
+
+    def check_params(self, params):
+        """Raise a QueryParamsError unless <params> are exactly the params."""
+        names = params.keys() if params else ()
+
+        if self.param_names.symmetric_difference(names):
+            missing = sorted(self.param_names.difference(names))
+            unknown = sorted(set(names).difference(self.param_names))
+            raise QueryParamsError(
+                "Query {} was given the wrong params, missing: {}, "
+                "unknown: {}".format(self.name, missing, unknown))
+
+
+class QueryRegistry:
+    """
+    The named queries of a connections file.
+
+    Each entry of the queries section of the file is either a query, with a
+    name and its sql, or the file its SQL is in, or a directory, each .sql
+    file of which is a query named after the file. Entries can also have a
+    connection and the type returned, one of recordset, record,
+    record_scalar or execute. Relative paths are relative to the
+    connections file.
+    """
+
+    def __init__(self, queries_config=None, base_dir="."):
+        """Load and parse every query of <queries_config>."""
+        self.queries = {}
+
+        for entry in queries_config or []:
+            options = {"con_name": entry.get("connection"),
+                       "returns": entry.get("returns", "recordset")}
+
+            if "directory" in entry:
+                directory = os.path.join(base_dir, entry["directory"])
+
+                for file_name in sorted(os.listdir(directory)):
+                    name, extension = os.path.splitext(file_name)
+                    if extension == ".sql":
+                        self._add(Query(name, _read_file(
+                            os.path.join(directory, file_name)), **options))
+
+            elif "sql" in entry:
+                self._add(Query(entry["name"], entry["sql"], **options))
+
+            elif "file" in entry:
+                self._add(Query(entry["name"], _read_file(
+                    os.path.join(base_dir, entry["file"])), **options))
+
+            else:
+                raise QueryConfigError(
+                    "Query {} has no sql, file or directory".format(
+                        entry.get("name")))
+
+    def __contains__(self, name):
+        return name in self.queries
+
+    def __len__(self):
+        return len(self.queries)
+
+    def get(self, name):
+        """Return the Query of <name>."""
+        try:
+            return self.queries[name]
+        except KeyError as e:
+            raise UnknownQueryError(
+                "Unknown query {}".format(name)) from e
+
+    def _add(self, query):
+        """Add a query, raising a QueryConfigError if the name is taken."""
+        if query.name in self.queries:
+            raise QueryConfigError(
+                "More than 1 query is named {}".format(query.name))
+
+        self.queries[query.name] = query
+
+
+def _read_file(file_name):
+    """Return the SQL in a file."""
+    with open(file_name) as file:
+        return file.read()
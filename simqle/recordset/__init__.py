@@ -1 +1,5 @@
-from .recordset import RecordSet, RecordScalar, Record
+from .recordset import (
+    RecordSet, RecordView, RecordScalar, Record, StreamingRecordSet,
+)
+from .columnar import ColumnarRecordSet
+from .arrow import ArrowRecordSet
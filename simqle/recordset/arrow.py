@@ -0,0 +1,47 @@
+"""Define the ArrowRecordSet Class."""
+from .recordset import RecordSet
+
+
+class ArrowRecordSet(RecordSet):
+    """
+    A RecordSet whose rows are held in a pyarrow Table.
+
+    This is the object returned by the ConnectionManager from the
+    recordset_parallel method. The values are only converted to Python
+    objects when they are used: a column is converted straight from the
+    table, and the rows are only built the first time data, or anything
+    that iterates over the records, is used.
+    """
+
+    __slots__ = ("table", "_rows")
+
+    def __init__(self, table):
+        """Initialise this object with a pyarrow Table."""
+        self.table = table
+        self.headings = table.column_names
+        self._index = None
+        self._columns = {}
+        self._rows = None
+
+    def __bool__(self):
+        return self.table.num_rows > 0
+
+    @property
+    def data(self):
+        """The list of rows as tuples, or None if there are no rows."""
+        if not self:
+            return None
+
+        if self._rows is None:
+            self._rows = list(zip(*[column.to_pylist()
+                                    for column in self.table.columns]))
+        return self._rows
+
+    def _extract(self, headings):
+        """Return the cached column of each of <headings>."""
+        for heading in headings:
+            if heading not in self._columns:
+                self._columns[heading] = self.table.column(
+                    self._position(heading)).to_pylist()
+
+        return [self._columns[heading] for heading in headings]
@@ -0,0 +1,168 @@
+"""Define the ColumnarRecordSet Class."""
+from .exceptions import UnknownHeadingError
+
+
+class ColumnarRecordSet:
+    """
+    A RecordSet that stores each column as a NumPy array.
+
+    This is the object returned by the ConnectionManager from the
+    columnar_recordset method. The arrays are built batch by batch as the
+    rows are fetched, so column access doesn't copy any data and numeric
+    aggregation is vectorised.
+
+    Columns of bools, ints or floats are stored with those dtypes. Any other
+    column, such as strings, dates or decimals, is stored as an object array.
+    Columns containing NULLs are masked arrays, masked where the value was
+    NULL.
+    """
+
+    def __init__(self, headings, arrays):
+        """Initialise this object with headings and an array per heading."""
+        self.headings = headings
+        self.arrays = dict(zip(headings, arrays))
+        self._length = len(arrays[0]) if arrays else 0
+
+    @classmethod
+    def from_batches(cls, headings, batches):
+        """
+        Build a ColumnarRecordSet from an iterable of lists of rows.
+
+        Only one batch of rows is converted to Python lists at a time.
+        """
+        np = _import_numpy()
+
+        column_batches = [[] for _ in headings]
+
+        for batch in batches:
+            for column, values in zip(column_batches, zip(*batch)):
+                column.append(_column_array(np, values))
+
+        arrays = [
+            _concatenate(np, column) if column else np.array([], dtype=object)
+            for column in column_batches
+        ]
+
+        return cls(headings=headings, arrays=arrays)
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, heading):
+        return self.column(heading)
+
+    def __iter__(self):
+        # tolist converts the values back to Python objects, with None for
+        # masked values.
+        columns = [self.arrays[heading].tolist() for heading in self.headings]
+        return zip(*columns)
+
+    def dict_gen(self):
+        """Iterate over records as dictionaries."""
+        for record in self:
+            yield {h: v for h, v in zip(self.headings, record)}
+
+    def as_dict(self):
+        """
+        Return the records as a list of dicts.
+
+        Converts every value back to a Python object, so isn't very
+        efficient for larger data sets.
+        """
+        return list(self.dict_gen())
+
+    def column(self, heading):
+        """Return the array of data for a particular heading."""
+        try:
+            return self.arrays[heading]
+        except KeyError as e:
+            raise UnknownHeadingError(heading) from e
+
+
+def _import_numpy():
+    """Import numpy, which is only required for columnar recordsets."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("numpy is required for columnar recordsets, "
+                          "install it with pip install numpy") from e
+
+    return numpy
+
+
+def _column_array(np, values):
+    """
+    Return (array, mask) for a batch of the values of a single column.
+
+    NULLs are filled with a zero value in numeric arrays, and are True in
+    the mask, which is None if there are no NULLs.
+    """
+    mask = [value is None for value in values]
+    has_nulls = any(mask)
+    non_null = [value for value in values if value is not None]
+
+    if non_null and all(type(value) is bool for value in non_null):
+        dtype, fill = bool, False
+    elif non_null and all(type(value) is int for value in non_null):
+        dtype, fill = np.int64, 0
+    elif non_null and all(type(value) in (int, float)
+                          for value in non_null):
+        dtype, fill = np.float64, 0.0
+    else:
+        dtype, fill = object, None
+
+    if has_nulls and dtype is not object:
+        values = [fill if value is None else value for value in values]
+
+    try:
+        array = np.array(values, dtype=dtype)
+    except OverflowError:
+        # ints too large for int64 are kept as Python ints.
+        dtype = object
+        array = np.array(values, dtype=dtype)
+
+    if array.ndim != 1:
+        # values that are sequences themselves, such as postgresql arrays,
+        # are kept as one object each.
+        array = np.empty(len(values), dtype=object)
+        for index, value in enumerate(values):
+            array[index] = value
+
+    return array, np.array(mask, dtype=bool) if has_nulls else None
+
+
+def _concatenate(np, column):
+    """Concatenate the (array, mask) batches of a column into one array."""
+    # batches of only NULLs don't decide the dtype of the column.
+    typed = [array for array, mask in column
+             if mask is None or not mask.all()]
+
+    # batches of different types are only promoted between ints and floats,
+    # numpy would otherwise turn bools and numbers into strings or numbers.
+    kinds = {array.dtype.kind for array in typed}
+    if not typed or len(kinds) > 1 and ("O" in kinds or "b" in kinds):
+        dtype = np.dtype(object)
+    else:
+        dtype = np.result_type(*typed)
+
+    arrays = [
+        array.astype(dtype, copy=False) if mask is None or not mask.all()
+        else np.zeros(len(array), dtype=dtype) if dtype.kind != "O"
+        else array
+        for array, mask in column
+    ]
+
+    array = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+    if all(mask is None for _, mask in column):
+        return array
+
+    mask = np.concatenate([
+        np.zeros(len(array_), dtype=bool) if mask is None else mask
+        for array_, mask in column
+    ])
+
+    return np.ma.masked_array(array, mask=mask)
@@ -1,4 +1,6 @@
 """Define the RecordSet Class."""
+from operator import itemgetter
+
 from .exceptions import UnknownHeadingError, NoScalarDataError
 
 
@@ -15,6 +17,8 @@ class RecordSet:
     in the future, we can move the __init__ method to a class method.
     """
 
+    __slots__ = ("data", "headings", "_index", "_columns")
+
     def __init__(self, headings, data):
         """
         Initialise this object with data and headings.
@@ -24,6 +28,8 @@ class RecordSet:
         """
         self.data = data or None
         self.headings = headings
+        self._index = None
+        self._columns = {}
 
     def __bool__(self):
         return self.data is not None
@@ -33,12 +39,36 @@ class RecordSet:
             return iter(self.data)
         return iter(())
 
+    @property
+    def index(self):
+        """
+        The dict of each heading to the index of its value in a record.
+
+        It is built the first time it is needed, and shared by every record.
+        As in the dicts of dict_gen, the last of a repeated heading is used,
+        while column and the other column methods use the first.
+        """
+        if self._index is None:
+            self._index = heading_index(self.headings)
+        return self._index
+
+    def records(self):
+        """
+        Iterate over the records as RecordViews.
+
+        A RecordView looks up a value by heading without copying the record,
+        so this is cheaper than dict_gen when only a few values of each
+        record are used.
+        """
+        index = self.index
+        for record in self.data or []:
+            yield RecordView(record, index)
+
     def dict_gen(self):
         """Iterate over records as dictionaries."""
-        if self:
-            for record in self.data or []:
-                yield {h: v for h, v in zip(self.headings, record)}
-        return []
+        headings = self.headings
+        for record in self.data or []:
+            yield dict(zip(headings, record))
 
     def as_dict(self):
         """
@@ -47,21 +77,142 @@ class RecordSet:
         Creates a copy of the data, so isn't very efficient for larger
         data sets.
         """
-        if self:
-            return [
-                {h: v for h, v in zip(self.headings, record)}
-                for record in self.data or []
-            ]
-        return []
+        return list(self.dict_gen())
 
     def column(self, heading):
-        """Return a list of data for a particular heading."""
+        """
+        Return a list of data for a particular heading.
+
+        The column is only extracted from the records once, later calls
+        return a copy of it.
+        """
+        return list(self._extract([heading])[0])
+
+    def columns(self, headings):
+        """
+        Return a list of data for each of <headings>, in a single pass.
+
+            ids, names = rst.columns(["id", "name"])
+        """
+        return [list(column) for column in self._extract(headings)]
+
+    def select(self, headings):
+        """Return a new RecordSet of only the columns of <headings>."""
+        return RecordSet(headings=list(headings),
+                         data=list(zip(*self._extract(headings))))
+
+    def where(self, heading, condition):
+        """
+        Return a new RecordSet of the records that match a condition.
+
+        <condition> is either a function, in which case the records where it
+        returns True for the value of <heading> are kept, or a value, in
+        which case the records where <heading> equals it are kept.
+        """
+        if not callable(condition):
+            value = condition
+
+            def condition(value_):
+                return value_ == value
+
+        column = self._extract([heading])[0]
+        return RecordSet(headings=self.headings, data=[
+            record for record, value_ in zip(self.data or [], column)
+            if condition(value_)
+        ])
+
+    def group_by(self, heading):
+        """
+        Return a dict of each value of <heading> to a RecordSet of its records.
+
+        The values are in the order they are first found.
+        """
+        groups = {}
+        column = self._extract([heading])[0]
+
+        for record, value in zip(self.data or [], column):
+            groups.setdefault(value, []).append(record)
+
+        return {value: RecordSet(headings=self.headings, data=records)
+                for value, records in groups.items()}
+
+    def _extract(self, headings):
+        """
+        Return the cached column of each of <headings>.
+
+        Any columns that aren't cached yet are extracted together in a
+        single pass over the records.
+        """
+        missing = [heading for heading in dict.fromkeys(headings)
+                   if heading not in self._columns]
+        positions = [self._position(heading) for heading in missing]
+
+        if len(missing) == 1:
+            position = positions[0]
+            self._columns[missing[0]] = [record[position]
+                                         for record in self.data or []]
+
+        elif missing:
+            values = zip(*map(itemgetter(*positions), self.data or []))
+            columns = [list(column) for column in values] or [
+                [] for _ in missing]
+            self._columns.update(zip(missing, columns))
+
+        return [self._columns[heading] for heading in headings]
+
+    def _position(self, heading):
+        """
+        Return the index of the column of <heading>.
+
+        Unlike in the records, the first of a repeated heading is used, as
+        column always has.
+        """
         try:
-            heading_index = self.headings.index(heading)
+            return self.headings.index(heading)
         except ValueError as e:
             raise UnknownHeadingError(heading) from e
 
-        return [record[heading_index] for record in self.data or []]
+
+class RecordView:
+    """
+    A read-only view of a single record of a RecordSet.
+
+    Values are looked up by heading with the heading index shared by every
+    record of the RecordSet, so no copy of the record is made. The record
+    is only copied into a dict if as_dict is called.
+    """
+
+    __slots__ = ("data", "_index")
+
+    def __init__(self, data, index):
+        """Initialise a view of the <data> of a record with a heading index."""
+        self.data = data
+        self._index = index
+
+    def __getitem__(self, heading):
+        try:
+            return self.data[self._index[heading]]
+        except KeyError as e:
+            raise UnknownHeadingError(heading) from e
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, heading, default=None):
+        """Return the value of <heading>, or <default> if it isn't one."""
+        heading_index = self._index.get(heading)
+        if heading_index is None:
+            return default
+        return self.data[heading_index]
+
+    def as_dict(self):
+        """Return a new dict of the record."""
+        data = self.data
+        return {heading: data[position]
+                for heading, position in self._index.items()}
 
 
 class RecordScalar:
@@ -78,25 +229,25 @@ class RecordScalar:
     then you use self.datum truthiness as per normal.
     """
 
+    __slots__ = ("heading", "_exists", "_datum")
+
     def __init__(self, headings, data):
         # Only keep the first heading
         self.heading = headings[0]
 
-        # Only keep None or the first value of data.
-        if data:
-            self._datum = [data[0][0]]
-        else:
-            self._datum = None
+        # Only keep whether a record was returned, and its first value.
+        self._exists = bool(data)
+        self._datum = data[0][0] if data else None
 
     def __bool__(self):
         # was a record returned
-        return bool(self._datum)
+        return self._exists
 
     @property
     def datum(self):
         if not self:
             raise NoScalarDataError()
-        return self._datum[0]
+        return self._datum
 
     def sdatum(self, default=None):
         """
@@ -107,34 +258,118 @@ class RecordScalar:
         """
         if not self:
             return default
-        return self._datum[0]
+        return self._datum
 
 
 class Record:
     """
     The Record object assumes only a single record is being returned.
 
-    If multiple rows are returned, only the first is kept.
+    If multiple rows are returned, only the first is kept. Values are looked
+    up by heading without copying the record, and the dict of as_dict is
+    only built the first time it is used.
     """
 
+    __slots__ = ("data", "headings", "_index", "_dict")
+
     def __init__(self, headings, data):
         self.data = data[0] if data else None
-
         self.headings = headings
-        if self.data:
-            self._dict = {k: v for k, v in zip(self.headings, self.data)}
-        else:
-            self._dict = {}
+        self._index = None
+        self._dict = None
 
     def __getitem__(self, heading):
+        if self._index is None:
+            self._index = heading_index(self.headings)
+
         try:
-            return self._dict[heading]
-        except KeyError as e:
+            return self.data[self._index[heading]]
+        except (KeyError, TypeError) as e:
+            # a TypeError means there's no record.
             raise UnknownHeadingError(heading) from e
 
     @property
     def as_dict(self):
+        if self._dict is None:
+            self._dict = dict(zip(self.headings, self.data or ()))
         return self._dict
 
     def __bool__(self):
         return self.data is not None
+
+
+def heading_index(headings):
+    """
+    Return a dict of each heading to its index.
+
+    If a heading is repeated the last is used, as it is in the dicts of
+    dict_gen and as_dict.
+    """
+    return {heading: position for position, heading in enumerate(headings)}
+
+
+class StreamingRecordSet:
+    """
+    A RecordSet that fetches its rows lazily, one batch at a time.
+
+    This is the object returned by the ConnectionManager from the
+    stream_recordset method. Unlike RecordSet, the rows are never all held in
+    memory at once, so it can only be iterated over a single time.
+
+    The underlying connection is held open only while the rows are being
+    iterated over. It is closed as soon as the rows are exhausted, the
+    iteration is abandoned, or the with block the object is used in is
+    exited, whichever comes first.
+    """
+
+    def __init__(self, headings, fetch_batch, close, batch_size):
+        """
+        Initialise this object with headings and access to an open cursor.
+
+        <fetch_batch> is called with <batch_size> and returns a list of at
+        most that many rows, or an empty list once the rows are exhausted.
+        <close> releases the underlying connection.
+        """
+        self.headings = headings
+        self.batch_size = batch_size
+        self.row_count = 0
+        self.closed = False
+
+        self._fetch_batch = fetch_batch
+        self._close = close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self):
+        """Iterate over lists of at most batch_size rows."""
+        try:
+            while not self.closed:
+                batch = self._fetch_batch(self.batch_size)
+                if not batch:
+                    break
+
+                self.row_count += len(batch)
+                yield batch
+        finally:
+            self.close()
+
+    def dict_gen(self):
+        """Iterate over records as dictionaries."""
+        for record in self:
+            yield {h: v for h, v in zip(self.headings, record)}
+
+    def close(self):
+        """Release the underlying connection if it is still open."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self._close()
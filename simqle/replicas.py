@@ -0,0 +1,177 @@
+"""Route reads to the read replicas of a connection."""
+
+import random
+
+from itertools import count
+from threading import Lock
+from time import monotonic, perf_counter
+
+from sqlalchemy import text
+
+from simqle.constants import (
+    REPLICA_STRATEGIES, DEFAULT_REPLICA_RETRY_INTERVAL, REPLICA_LATENCY_DECAY,
+)
+from simqle.exceptions import UnknownReplicaStrategyError
+from simqle.logging import logger as log
+
+
+class ReplicaSet:
+    """
+    The read replicas of a connection, and the strategy to choose between.
+
+    The strategies are:
+        round_robin: each replica in turn
+        least_outstanding: the replica with the fewest reads in progress
+        latency_weighted: a random replica, weighted by the inverse of its
+            average latency, so faster replicas are chosen more often
+
+    A replica that fails is ejected, and isn't chosen again until
+    <retry_interval> seconds have passed or a health check succeeds.
+    """
+
+    def __init__(self, connections, strategy="round_robin",
+                 retry_interval=DEFAULT_REPLICA_RETRY_INTERVAL):
+        """Initialise a ReplicaSet of replica _Connections."""
+        if strategy not in REPLICA_STRATEGIES:
+            raise UnknownReplicaStrategyError(
+                "{} is an unknown replica strategy".format(strategy))
+
+        self.replicas = [_Replica(connection) for connection in connections]
+        self.strategy = strategy
+        self.retry_interval = retry_interval
+        self._counter = count()
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        Return the replica to read from, or None if every one is ejected.
+
+        The replica must be released once the read is complete.
+        """
+        now = monotonic()
+
+        with self._lock:
+            healthy = [replica for replica in self.replicas
+                       if replica.ejected_until <= now]
+
+            if not healthy:
+                return None
+
+            if self.strategy == "round_robin":
+                replica = healthy[next(self._counter) % len(healthy)]
+
+            elif self.strategy == "least_outstanding":
+                replica = min(healthy, key=lambda replica_:
+                              replica_.outstanding)
+
+            else:
+                # replicas without a latency yet are tried first.
+                unmeasured = [replica_ for replica_ in healthy
+                              if replica_.latency is None]
+                if unmeasured:
+                    replica = unmeasured[0]
+                else:
+                    replica = random.choices(
+                        healthy, weights=[1 / max(replica_.latency, 1e-6)
+                                          for replica_ in healthy])[0]
+
+            replica.outstanding += 1
+
+        return replica
+
+    def release(self, replica, elapsed_time=None, failed=False):
+        """
+        Release a replica after a read that took <elapsed_time> seconds.
+
+        If the read <failed>, the replica is ejected.
+        """
+        with self._lock:
+            replica.outstanding -= 1
+
+            if failed:
+                replica.ejected_until = monotonic() + self.retry_interval
+
+            elif elapsed_time is not None:
+                replica.observe(elapsed_time)
+
+    def check(self):
+        """
+        Run SELECT 1 on every replica, ejecting any that fail.
+
+        Replicas that succeed are returned to use straight away. Return a
+        dict of replica name to its latency in seconds, or None if it failed.
+        """
+        return {replica.connection.name: self.check_replica(replica)
+                for replica in self.replicas}
+
+    def check_replica(self, replica):
+        """
+        Run SELECT 1 on a replica, ejecting it if it fails.
+
+        Return its latency in seconds, or None if it failed.
+        """
+        start_time = perf_counter()
+
+        try:
+            with replica.connection.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        except Exception:
+            log.warning("The health check of replica %s failed",
+                        replica.connection.name, exc_info=True)
+
+            with self._lock:
+                replica.ejected_until = monotonic() + self.retry_interval
+            return None
+
+        elapsed_time = perf_counter() - start_time
+
+        with self._lock:
+            replica.ejected_until = 0.0
+            replica.observe(elapsed_time)
+
+        return elapsed_time
+
+
+class _Replica:
+    """A replica _Connection with its reads in progress and latency."""
+
+    __slots__ = ("connection", "outstanding", "latency", "ejected_until")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.outstanding = 0
+        self.latency = None
+        self.ejected_until = 0.0
+
+    def observe(self, elapsed_time):
+        """Add a read to the moving average of the latency."""
+        if self.latency is None:
+            self.latency = elapsed_time
+        else:
+            self.latency += REPLICA_LATENCY_DECAY * (
+                elapsed_time - self.latency)
+
+
+def replica_configs(conn_config):
+    """
+    Return the connection configs of the replicas of a connection config.
+
+    Each replica inherits the options of its primary, overridden by its own
+    options such as connection, and is named after the primary unless it
+    has a name of its own.
+    """
+    primary_config = {
+        option: value for option, value in conn_config.items()
+        if option not in ("replicas", "replica_strategy",
+                          "replica_retry_interval", "default")
+    }
+
+    configs = []
+    for index, replica_config in enumerate(conn_config["replicas"], start=1):
+        config = dict(primary_config,
+                      name="{}-replica-{}".format(conn_config["name"], index))
+        config.update(replica_config)
+        configs.append(config)
+
+    return configs
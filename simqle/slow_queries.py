@@ -0,0 +1,114 @@
+"""Record queries that are slower than the threshold of their connection."""
+
+import time
+
+from collections import deque
+from threading import Lock
+
+from sqlalchemy import text
+
+from simqle.constants import DEFAULT_SLOW_QUERY_ENTRIES, EXPLAIN_PREFIXES
+from simqle.logging import logger as log
+from simqle.recordset import RecordSet
+
+# The operations that return rows, and so can be explained.
+EXPLAINED_OPERATIONS = ("recordset", "stream")
+
+
+class SlowQuery:
+    """
+    A query that took longer than the slow_query_threshold of its connection.
+
+    params_shape is a dict of the names of the params to the names of their
+    types, the values themselves aren't kept. explain is a RecordSet of the
+    query plan if the connection has the explain option, or None.
+    """
+
+    __slots__ = ("con_name", "sql", "fingerprint", "params_shape",
+                 "duration", "row_count", "explain", "recorded_at")
+
+    def __init__(self, event, explain=None):
+        """Initialise a SlowQuery from a QueryEvent."""
+        self.con_name = event.con_name
+        self.sql = event.sql
+        self.fingerprint = event.fingerprint
+        self.params_shape = {name: type(value).__name__
+                             for name, value in (event.params or {}).items()}
+        self.duration = event.total_time
+        self.row_count = event.row_count
+        self.explain = explain
+        self.recorded_at = time.time()
+
+
+class SlowQueryLog:
+    """
+    An instrumentation hook that keeps the most recent slow queries.
+
+    A query is slow if it took at least the slow_query_threshold, in
+    seconds, of its connection in the connections file. If the connection
+    also has the explain option, the plan of each slow query that returns
+    rows is captured with the dialect's EXPLAIN. At most <max_entries> slow
+    queries are kept, the oldest are discarded first.
+    """
+
+    def __init__(self, manager, max_entries=DEFAULT_SLOW_QUERY_ENTRIES):
+        """Initialise an empty log of the slow queries of <manager>."""
+        self.manager = manager
+        self.entries = deque(maxlen=max_entries)
+        self._lock = Lock()
+
+    def __call__(self, event):
+        """Record <event> if it is slow."""
+        config = self.manager._connection_configs.get(event.con_name) or {}
+        threshold = config.get("slow_query_threshold")
+
+        if threshold is None or event.error is not None or (
+                event.total_time < threshold):
+            return
+
+        explain = None
+        if config.get("explain") and event.operation in EXPLAINED_OPERATIONS:
+            explain = self._explain(event)
+
+        with self._lock:
+            self.entries.append(SlowQuery(event, explain=explain))
+
+    def queries(self, con_name=None, fingerprint=None):
+        """Return the slow queries, oldest first, optionally filtered."""
+        with self._lock:
+            entries = list(self.entries)
+
+        return [entry for entry in entries
+                if (con_name is None or entry.con_name == con_name)
+                and (fingerprint is None or entry.fingerprint == fingerprint)]
+
+    def clear(self):
+        """Remove every slow query."""
+        with self._lock:
+            self.entries.clear()
+
+    def _explain(self, event):
+        """
+        Return a RecordSet of the plan of <event>'s query.
+
+        Return None if the dialect has no EXPLAIN, or the EXPLAIN fails.
+        """
+        engine = self.manager.get_engine(event.con_name)
+        prefix = EXPLAIN_PREFIXES.get(engine.dialect.name)
+
+        if prefix is None:
+            return None
+
+        # the engine is used directly, so the EXPLAIN isn't instrumented
+        # itself.
+        try:
+            with engine.connect() as connection:
+                result = connection.execute(text(prefix + event.sql),
+                                            event.params or {})
+                return RecordSet(headings=list(result.keys()),
+                                 data=result.fetchall())
+
+        except Exception:
+            log.warning("The slow query on %s couldn't be explained",
+                        event.con_name, exc_info=True)
+            return None